@@ -0,0 +1,92 @@
+"""
+Benchmark clean_html_text
+Controleert de single-pass HTML-naar-tekst omzetting tegen de golden corpus
+(uitvoer van de oude BeautifulSoup-variant) en meet de snelheid per beschrijving.
+
+Gebruik:
+  python benchmarks/clean_html.py [aantal_herhalingen]
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'portals'))
+
+from nash import clean_html_text  # noqa: E402
+
+CORPUS_PATH = Path(__file__).resolve().parent / 'clean_html_corpus.json'
+
+
+def clean_html_text_bs4(html_text, max_length=10000):
+    """De oorspronkelijke BeautifulSoup-implementatie, als referentie."""
+    if not html_text:
+        return ""
+
+    soup = BeautifulSoup(html_text, 'html.parser')
+
+    for br in soup.find_all(['br', 'p']):
+        br.replace_with('\n' + br.get_text() + '\n')
+
+    for li in soup.find_all('li'):
+        li.replace_with('\n• ' + li.get_text())
+
+    for strong in soup.find_all(['strong', 'b']):
+        strong.replace_with('*' + strong.get_text() + '*')
+    for em in soup.find_all(['em', 'i']):
+        em.replace_with('_' + em.get_text() + '_')
+
+    text = soup.get_text()
+    text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+
+    if len(text) > max_length:
+        text = text[:max_length] + '...'
+
+    return text
+
+
+def check_corpus(corpus):
+    """Vergelijkt beide implementaties met de verwachte uitvoer. Geeft aantal fouten terug."""
+    fouten = 0
+    for case in corpus:
+        for naam, functie in (('single-pass', clean_html_text), ('bs4', clean_html_text_bs4)):
+            uitvoer = functie(case['html'], case['max_length'])
+            if uitvoer != case['verwacht']:
+                fouten += 1
+                print(f"✗ {case['naam']} ({naam})")
+                print(f"  verwacht: {case['verwacht']!r}")
+                print(f"  kreeg:    {uitvoer!r}")
+    return fouten
+
+
+def benchmark(corpus, herhalingen):
+    """Meet de gemiddelde tijd per beschrijving voor beide implementaties."""
+    print(f"{'case':<30} {'bs4 (µs)':>10} {'nieuw (µs)':>11} {'factor':>7}")
+    totaal_oud = totaal_nieuw = 0.0
+    for case in corpus:
+        args = (case['html'], case['max_length'])
+        oud = timeit.timeit(lambda: clean_html_text_bs4(*args), number=herhalingen) / herhalingen
+        nieuw = timeit.timeit(lambda: clean_html_text(*args), number=herhalingen) / herhalingen
+        totaal_oud += oud
+        totaal_nieuw += nieuw
+        print(f"{case['naam']:<30} {oud * 1e6:>10.1f} {nieuw * 1e6:>11.1f} {oud / nieuw:>6.1f}x")
+    print(f"{'totaal':<30} {totaal_oud * 1e6:>10.1f} {totaal_nieuw * 1e6:>11.1f} {totaal_oud / totaal_nieuw:>6.1f}x")
+
+
+if __name__ == "__main__":
+    herhalingen = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    fouten = check_corpus(corpus)
+    if fouten:
+        print(f"\n{fouten} afwijking(en) ten opzichte van de golden corpus")
+        sys.exit(1)
+    print(f"✓ Golden corpus: {len(corpus)} cases identiek\n")
+
+    benchmark(corpus, herhalingen)
@@ -0,0 +1,603 @@
+"""
+Benchmark van de hele pipeline
+Draait de echte entry points tegen een wegwerp-PostgreSQL en lokale stub servers:
+
+  scrape   - scrape_harveynash() tegen een stub van de HarveyNash zoek-API
+  process  - process_vacatures() tegen een stub van de Trello API
+  webhook  - een burst Trello webhooks op POST /webhook van de listener, tot de queue leeg is
+
+De scenario's draaien na elkaar op dezelfde database (process verwerkt wat
+scrape heeft opgeslagen, de webhooks gaan over de kaarten van process), elk in
+een eigen proces zodat het piekgeheugen per scenario klopt.
+
+Per scenario: items/sec, database round trips per item (execute en commit; de
+pipeline gebruikt alleen client-side cursors, dus een fetch gaat niet naar de
+server), p50/p99 latency en piek RSS. Het rapport komt
+in benchmarks/results/pipeline-<commit>.json en is te vergelijken met een
+eerder rapport.
+
+Database: BENCH_DATABASE_URL wijst naar een server waarop een tijdelijke
+database aangemaakt (en na afloop verwijderd) mag worden. Zonder
+BENCH_DATABASE_URL wordt met initdb een tijdelijk cluster gestart.
+De Trello rate limits staan uit: de stub heeft geen limiet, en anders meet je de token bucket.
+
+Gebruik:
+  python benchmarks/pipeline.py                              - Alle scenario's draaien
+  python benchmarks/pipeline.py --vergelijk <rapport.json>   - En vergelijken met een eerder rapport
+"""
+
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import psycopg2
+from psycopg2.extensions import make_dsn
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'portals'))
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+SCENARIOS = ('scrape', 'process', 'webhook')
+
+BENCH_VACATURES = int(os.getenv('BENCH_VACATURES', '1000'))
+BENCH_WEBHOOKS = int(os.getenv('BENCH_WEBHOOKS', '2000'))
+BENCH_WEBHOOK_CLIENTS = int(os.getenv('BENCH_WEBHOOK_CLIENTS', '16'))
+# Gesimuleerde netwerktijd per request naar de stub servers
+BENCH_LATENCY_MS = float(os.getenv('BENCH_LATENCY_MS', '20'))
+# Elke zoveelste vacature is een herplaatsing van de vorige (werk voor de dedup stap)
+DUPLICATE_EVERY = 10
+
+TRELLO_LIST_ID = 'bench-lijst-nieuw'
+TRELLO_LIST_IDS = (TRELLO_LIST_ID, 'bench-lijst-gesprek', 'bench-lijst-afgewezen')
+NASH_API_PATH = '/_sf/api/v1/jobs/search.json'
+RESULT_PREFIX = 'RESULTAAT '
+
+TITELS = ['Product Owner', 'Java Developer', 'Data Analist', 'Scrum Master', 'Projectleider',
+          'Test Engineer', 'Solution Architect', 'Business Analist', 'Informatieadviseur']
+PLAATSEN = ['Utrecht', 'Rotterdam', 'Den Haag', 'Amsterdam', 'Groningen', 'Zwolle', 'Arnhem']
+WOORDEN = ('de het een en van in op voor met bij als team klant project ervaring kennis '
+           'organisatie gemeente ministerie data systeem applicatie beheer ontwikkeling '
+           'agile scrum stakeholders proces verbetering architectuur cloud integratie '
+           'verantwoordelijk samenwerken rapportage analyse ontwerp implementatie keten '
+           'digitale transformatie uitvoering beleid informatie security netwerk').split()
+
+
+# ============================================================================
+# Synthetische data
+# ============================================================================
+
+def make_job(index):
+    """Een HarveyNash zoekresultaat, deterministisch per index."""
+    bron = index - 1 if index % DUPLICATE_EVERY == DUPLICATE_EVERY - 1 else index
+    rng = random.Random(bron)
+    titel = f"{rng.choice(['', 'Senior ', 'Medior '])}{rng.choice(TITELS)}"
+    plaats = rng.choice(PLAATSEN)
+    alineas = [
+        ' '.join(rng.choice(WOORDEN) for _ in range(rng.randint(40, 90)))
+        for _ in range(rng.randint(4, 10))
+    ]
+    beschrijving = (
+        f"<p>Voor onze klant Gemeente {plaats} in {plaats} zoeken wij een <strong>{titel}</strong>.</p>"
+        + ''.join(f"<p>{alinea}</p>" for alinea in alineas)
+        + '<ul>' + ''.join(f"<li>{rng.choice(WOORDEN)} {rng.choice(WOORDEN)}</li>" for _ in range(5)) + '</ul>'
+        + f"<p>Aantal uur per week: {rng.choice([24, 32, 36, 40])}</p>"
+    )
+    return {
+        'title': titel,
+        'description': beschrijving,
+        'url_slug': f"bench-{index}",
+        'addresses': [f"{plaats}, Nederland"],
+        'salary_package': f"€{rng.randint(70, 130)} per uur",
+        'expires_at': 1800000000 + bron * 3600,
+        'categories': [],
+    }
+
+
+def make_action(index, card_id):
+    """Een Trello webhook actie: afwisselend een verplaatsing en een label."""
+    datum = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+    basis = {
+        'id': f"{index:024x}",
+        'date': datum,
+        'memberCreator': {'fullName': 'Bench Gebruiker'},
+    }
+    if index % 3 == 2:
+        return {**basis, 'type': 'addLabelToCard', 'data': {'card': {'id': card_id}, 'label': {'name': 'Interessant'}}}
+    voor, na = TRELLO_LIST_IDS[index % 3], TRELLO_LIST_IDS[(index + 1) % 3]
+    return {**basis, 'type': 'updateCard', 'data': {
+        'card': {'id': card_id},
+        'listBefore': {'id': voor, 'name': voor},
+        'listAfter': {'id': na, 'name': na},
+    }}
+
+
+# ============================================================================
+# Stub servers
+# ============================================================================
+
+class StubHandler(BaseHTTPRequestHandler):
+    """JSON handler met keep-alive en een vaste vertraging per request."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def body(self):
+        lengte = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(lengte) or b'null') if lengte else None
+
+    def reply(self, data, status=200):
+        time.sleep(BENCH_LATENCY_MS / 1000)
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class NashStub(StubHandler):
+    """De HarveyNash zoek-API met BENCH_VACATURES vacatures."""
+
+    def do_POST(self):
+        zoek = self.body()['job_search']
+        offset, aantal = zoek['offset'], zoek['jobs_per_page']
+        self.reply({
+            'total_size': BENCH_VACATURES,
+            'results': [{'job': make_job(i)} for i in range(offset, min(offset + aantal, BENCH_VACATURES))],
+        })
+
+
+class TrelloStub(StubHandler):
+    """De Trello calls van de processor: /batch, kaarten en bijlagen."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/1/batch':
+            return self.reply({'message': 'niet gevonden'}, 404)
+        antwoorden = []
+        for pad in parse_qs(url.query)['urls'][0].split(','):
+            if '/cards' in pad:
+                data = []
+            elif '/labels' in pad:
+                data = [{'id': 'bench-label-nash', 'name': 'HarveyNash'}]
+            else:
+                data = [{'id': lijst_id, 'name': lijst_id, 'pos': pos} for pos, lijst_id in enumerate(TRELLO_LIST_IDS)]
+            antwoorden.append({'200': data})
+        self.reply(antwoorden)
+
+    def do_POST(self):
+        self.body()
+        # Trello ids zijn 24 hex tekens
+        self.reply({'id': uuid.uuid4().hex[:24]})
+
+
+@contextmanager
+def stub_server(handler):
+    """Start een stub server op een vrije poort. Geeft de basis URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ============================================================================
+# Metingen
+# ============================================================================
+
+class RoundTrips:
+    """Telt database round trips over alle connecties en threads van dit proces."""
+
+    def __init__(self):
+        self.aantal = 0
+        self.lock = threading.Lock()
+
+    def tel(self, aantal=1):
+        with self.lock:
+            self.aantal += aantal
+
+
+round_trips = RoundTrips()
+
+
+class TellendeCursor(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        round_trips.tel()
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        round_trips.tel(len(vars_list))
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        round_trips.tel()
+        return super().copy_expert(sql, file, size)
+
+    # Alleen bij een server-side cursor (nu niet in de pipeline) is een fetch een FETCH naar de server
+    def fetchone(self):
+        if self.name:
+            round_trips.tel()
+        return super().fetchone()
+
+    def fetchmany(self, size=None):
+        if self.name:
+            round_trips.tel()
+        return super().fetchmany(size) if size is not None else super().fetchmany()
+
+    def fetchall(self):
+        if self.name:
+            round_trips.tel()
+        return super().fetchall()
+
+
+class TellendeConnectie(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory', TellendeCursor)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        round_trips.tel()
+        return super().commit()
+
+    def rollback(self):
+        round_trips.tel()
+        return super().rollback()
+
+
+_connect = psycopg2.connect
+
+
+def tellend_connect(*args, **kwargs):
+    kwargs.setdefault('connection_factory', TellendeConnectie)
+    return _connect(*args, **kwargs)
+
+
+def query_one(sql, params=None):
+    """Losse query buiten de telling om (voor het controleren van het resultaat)."""
+    conn = _connect(os.environ['DATABASE_URL'])
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def percentile(waarden, p):
+    """Nearest-rank percentiel, of None zonder metingen."""
+    if not waarden:
+        return None
+    waarden = sorted(waarden)
+    return waarden[min(len(waarden) - 1, round(p / 100 * (len(waarden) - 1)))]
+
+
+def peak_rss_mb():
+    piek = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux geeft KB, macOS bytes
+    return piek / (1024 * 1024) if sys.platform == 'darwin' else piek / 1024
+
+
+def resultaat(items, seconden, latencies, latency_per):
+    return {
+        'items': items,
+        'seconden': round(seconden, 3),
+        'items_per_sec': round(items / seconden, 1) if seconden else None,
+        'round_trips_per_item': round(round_trips.aantal / items, 2) if items else None,
+        'latency_per': latency_per,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'piek_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+# ============================================================================
+# Scenario's (elk in een eigen proces)
+# ============================================================================
+
+def bench_scrape():
+    """Volledige sweep van de stub portal; latency per opgeslagen pagina."""
+    import nash
+    from base import PortalScraper
+
+    latencies = []
+    save_page = PortalScraper.save_page
+
+    def gemeten_save_page(self, *args):
+        start = time.perf_counter()
+        try:
+            return save_page(self, *args)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    nash.HarveyNashScraper.save_page = gemeten_save_page
+    with stub_server(NashStub) as url:
+        nash.API_URL = f"{url}{NASH_API_PATH}"
+        start = time.perf_counter()
+        _, nieuw = nash.scrape_harveynash(full=True)
+        seconden = time.perf_counter() - start
+    return resultaat(nieuw, seconden, latencies, 'pagina')
+
+
+def bench_process():
+    """Alle gescrapete vacatures naar de stub Trello; latency per kaart (aanmaken tot event)."""
+    import processor
+    from common.rate_limit import TokenBucket
+
+    gestart = {}
+    latencies = []
+    create_trello_card = processor.create_trello_card
+    log_added_to_trello = processor.log_added_to_trello
+
+    def gemeten_create(vacature, *args):
+        gestart[str(vacature['vacature_id'])] = time.perf_counter()
+        return create_trello_card(vacature, *args)
+
+    def gemeten_log(cur, vacature_id, *args, **kwargs):
+        log_added_to_trello(cur, vacature_id, *args, **kwargs)
+        if str(vacature_id) in gestart:
+            latencies.append(time.perf_counter() - gestart.pop(str(vacature_id)))
+
+    processor.create_trello_card = gemeten_create
+    processor.log_added_to_trello = gemeten_log
+    processor.trello_key_bucket = processor.trello_token_bucket = TokenBucket(10 ** 9, 1)
+    with stub_server(TrelloStub) as url:
+        processor.TRELLO_API_URL = f"{url}/1"
+        start = time.perf_counter()
+        processor.process_vacatures()
+        seconden = time.perf_counter() - start
+
+    verwerkt = query_one("SELECT COUNT(*) FROM vacature_pipeline WHERE stage NOT IN ('SCRAPED', 'FILTER_PASSED')")
+    return resultaat(verwerkt, seconden, latencies, 'kaart')
+
+
+def bench_webhook():
+    """Burst webhooks via HTTP op de listener; latency per POST, doorvoer tot de queue leeg is."""
+    import requests
+    from werkzeug.serving import make_server
+    import webhook_listener
+
+    conn = _connect(os.environ['DATABASE_URL'])
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT trello_card_id FROM vacature_status WHERE trello_card_id IS NOT NULL")
+        kaarten = [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+    if not kaarten:
+        raise RuntimeError("Geen kaarten in de database: draai eerst het process scenario")
+    acties = [make_action(i, kaarten[i % len(kaarten)]) for i in range(BENCH_WEBHOOKS)]
+
+    webhook_listener.start_workers()
+    server = make_server('127.0.0.1', 0, webhook_listener.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/webhook"
+
+    sessies = threading.local()
+    latencies = []
+
+    def post(actie):
+        if not hasattr(sessies, 'sessie'):
+            sessies.sessie = requests.Session()
+        start = time.perf_counter()
+        sessies.sessie.post(url, json={'action': actie}, timeout=30).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=BENCH_WEBHOOK_CLIENTS) as pool:
+        list(pool.map(post, acties))
+    while webhook_listener.queue.stats()[0]:
+        if time.perf_counter() - start > 600:
+            raise RuntimeError("Queue na 10 minuten nog niet leeg")
+        time.sleep(0.05)
+    seconden = time.perf_counter() - start
+    server.shutdown()
+
+    opgeslagen = query_one("SELECT COUNT(*) FROM vacature_events WHERE bron = 'webhook'")
+    return resultaat(opgeslagen, seconden, latencies, 'POST')
+
+
+def run_scenario(naam):
+    """Draait één scenario in dit proces en print het resultaat als JSON."""
+    psycopg2.connect = tellend_connect
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['WEBHOOK_QUEUE_PATH'] = os.path.join(tmp, 'queue.sqlite3')
+        uitkomst = {'scrape': bench_scrape, 'process': bench_process, 'webhook': bench_webhook}[naam]()
+    print(RESULT_PREFIX + json.dumps(uitkomst))
+
+
+# ============================================================================
+# Wegwerp-database
+# ============================================================================
+
+@contextmanager
+def temporary_database(basis_dsn):
+    """Maakt een lege database aan op de server van `basis_dsn` en verwijdert hem na afloop."""
+    naam = f"autopeet_bench_{os.getpid()}"
+    beheer = _connect(basis_dsn)
+    beheer.autocommit = True
+    try:
+        beheer.cursor().execute(f"CREATE DATABASE {naam}")
+        try:
+            yield make_dsn(basis_dsn, dbname=naam)
+        finally:
+            cur = beheer.cursor()
+            cur.execute("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s", (naam,))
+            cur.execute(f"DROP DATABASE IF EXISTS {naam}")
+    finally:
+        beheer.close()
+
+
+@contextmanager
+def temporary_cluster():
+    """Start met initdb/pg_ctl een tijdelijk PostgreSQL cluster (alleen een unix socket)."""
+    if not shutil.which('initdb') or not shutil.which('pg_ctl'):
+        raise SystemExit("Zet BENCH_DATABASE_URL, of zorg dat initdb en pg_ctl in het PATH staan")
+    werkmap = tempfile.mkdtemp(prefix='autopeet_bench_')
+    data = os.path.join(werkmap, 'data')
+    try:
+        subprocess.run(['initdb', '-D', data, '-A', 'trust', '-U', 'bench', '-E', 'UTF8', '--no-sync'],
+                       check=True, capture_output=True)
+        subprocess.run(['pg_ctl', '-D', data, '-l', os.path.join(werkmap, 'postgres.log'), '-w',
+                        '-o', f"-k {werkmap} -c listen_addresses='' -F", 'start'],
+                       check=True, capture_output=True)
+        try:
+            yield f"host={werkmap} user=bench dbname=postgres"
+        finally:
+            subprocess.run(['pg_ctl', '-D', data, '-m', 'immediate', 'stop'], capture_output=True)
+    finally:
+        shutil.rmtree(werkmap, ignore_errors=True)
+
+
+@contextmanager
+def throwaway_database():
+    """Een lege database met schema.sql, de portal NASH en een paar filter-keywords."""
+    basis = os.getenv('BENCH_DATABASE_URL')
+    with (temporary_database(basis) if basis else _cluster_database()) as dsn:
+        conn = _connect(dsn)
+        conn.autocommit = True
+        try:
+            cur = conn.cursor()
+            cur.execute((ROOT / 'schema.sql').read_text(encoding='utf-8'))
+            cur.execute("""
+                INSERT INTO portals (portal_id, naam, base_url)
+                VALUES ('NASH', 'HarveyNash', 'https://www.harveynash.nl');
+                INSERT INTO keywords (keyword, type)
+                VALUES ('Java', 'UNWANTED_KEYWORD'), ('Groningen', 'UNWANTED_LOCATIE');
+            """)
+            cur.execute("SHOW server_version")
+            versie = cur.fetchone()[0]
+        finally:
+            conn.close()
+        yield dsn, versie
+
+
+@contextmanager
+def _cluster_database():
+    with temporary_cluster() as dsn, temporary_database(dsn) as database_dsn:
+        yield database_dsn
+
+
+# ============================================================================
+# Rapport
+# ============================================================================
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'onbekend'
+
+
+def run_all():
+    """Draait alle scenario's in volgorde op één wegwerp-database. Geeft het rapport."""
+    rapport = {
+        'commit': git_commit(),
+        'datum': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'parameters': {
+            'vacatures': BENCH_VACATURES,
+            'webhooks': BENCH_WEBHOOKS,
+            'webhook_clients': BENCH_WEBHOOK_CLIENTS,
+            'latency_ms': BENCH_LATENCY_MS,
+        },
+        'scenarios': {},
+    }
+    with throwaway_database() as (dsn, versie):
+        rapport['postgres'] = versie
+        env = {
+            **os.environ,
+            'DATABASE_URL': dsn,
+            'TRELLO_API_KEY': 'bench',
+            'TRELLO_TOKEN': 'bench',
+            'TRELLO_LIST_ID': TRELLO_LIST_ID,
+            'TRELLO_BOARD_ID': 'bench-bord',
+            'SCRAPE_RATE_NASH': '0',
+            'HTTP_CACHE_DIR': '',
+        }
+        for naam in SCENARIOS:
+            print(f"{naam}...")
+            proces = subprocess.run([sys.executable, __file__, '--scenario', naam],
+                                    env=env, capture_output=True, text=True)
+            regels = [r for r in proces.stdout.splitlines() if r.startswith(RESULT_PREFIX)]
+            if proces.returncode or not regels:
+                print(proces.stdout[-3000:])
+                print(proces.stderr[-3000:])
+                raise SystemExit(f"Scenario {naam} mislukt")
+            rapport['scenarios'][naam] = json.loads(regels[-1][len(RESULT_PREFIX):])
+    return rapport
+
+
+KOLOMMEN = [
+    ('items', 'items', '{:>8}'),
+    ('items_per_sec', 'items/s', '{:>9}'),
+    ('round_trips_per_item', 'rt/item', '{:>8}'),
+    ('p50_ms', 'p50 ms', '{:>8}'),
+    ('p99_ms', 'p99 ms', '{:>8}'),
+    ('piek_rss_mb', 'RSS MB', '{:>8}'),
+]
+
+
+def print_report(rapport, vorige=None):
+    """Tabel per scenario; met `vorige` ook de verandering per meting."""
+    print(f"\nCommit {rapport['commit']}, PostgreSQL {rapport['postgres']}, {rapport['parameters']}")
+    if vorige:
+        print(f"Vergeleken met commit {vorige['commit']} ({vorige['datum']})")
+    print(f"{'scenario':<10}" + ''.join(fmt.format(kop) for _, kop, fmt in KOLOMMEN) + "  latency per")
+    for naam, meting in rapport['scenarios'].items():
+        print(f"{naam:<10}" + ''.join(fmt.format(str(meting[sleutel])) for sleutel, _, fmt in KOLOMMEN)
+              + f"  {meting['latency_per']}")
+        oud = (vorige or {}).get('scenarios', {}).get(naam)
+        if oud:
+            verschillen = []
+            for sleutel, _, fmt in KOLOMMEN:
+                if meting[sleutel] and oud.get(sleutel):
+                    verschillen.append(fmt.format(f"{(meting[sleutel] / oud[sleutel] - 1) * 100:+.0f}%"))
+                else:
+                    verschillen.append(fmt.format('-'))
+            print(f"{'':<10}" + ''.join(verschillen))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == '--scenario' and sys.argv[2] in SCENARIOS:
+        run_scenario(sys.argv[2])
+        sys.exit(0)
+
+    vorige = None
+    if len(sys.argv) == 3 and sys.argv[1] == '--vergelijk':
+        with open(sys.argv[2], encoding='utf-8') as f:
+            vorige = json.load(f)
+    elif len(sys.argv) > 1:
+        print("Usage:")
+        print("  python benchmarks/pipeline.py                              - Alle scenario's draaien")
+        print("  python benchmarks/pipeline.py --vergelijk <rapport.json>   - En vergelijken met een eerder rapport")
+        sys.exit(1)
+
+    rapport = run_all()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    pad = RESULTS_DIR / f"pipeline-{rapport['commit']}.json"
+    pad.write_text(json.dumps(rapport, indent=2), encoding='utf-8')
+    print_report(rapport, vorige)
+    print(f"\nRapport: {pad}")
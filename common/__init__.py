@@ -0,0 +1 @@
+"""Gedeelde modules voor scrapers, processor en webhook listener."""
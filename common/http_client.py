@@ -0,0 +1,202 @@
+"""
+Gedeelde HTTP client
+Eén gepoolde requests.Session (keep-alive) voor scraper en processor, met
+ETag/Last-Modified revalidatie en een optionele response cache op schijf.
+
+Alleen requests met cache=True worden gecached (bijv. portal zoekpagina's);
+schrijfacties zoals het aanmaken van Trello kaarten gaan altijd direct door.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '16'))
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR')
+HTTP_CACHE_TTL = float(os.getenv('HTTP_CACHE_TTL', '300'))
+HTTP_CACHE_MAX_MB = float(os.getenv('HTTP_CACHE_MAX_MB', '100'))
+
+
+class ResponseCache:
+    """
+    Response cache met een LRU in het geheugen en optioneel een kopie op schijf.
+    Boven max_bytes worden de minst recent gebruikte entries verwijderd.
+    """
+
+    def __init__(self, directory=None, max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def paths(self, key):
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def get(self, key):
+        """Geeft (meta, body) terug, of None als de key niet in de cache staat."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        if not self.directory:
+            return None
+        meta_path, body_path = self.paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        self.remember(key, meta, body)
+        return meta, body
+
+    def put(self, key, meta, body):
+        """Slaat een response op en ruimt daarna zo nodig de oudste entries op."""
+        self.remember(key, meta, body)
+        if not self.directory:
+            return
+        meta_path, body_path = self.paths(key)
+        body_path.write_bytes(body)
+        meta_path.write_text(json.dumps(meta), encoding='utf-8')
+        self.evict_disk()
+
+    def remember(self, key, meta, body):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key)[1])
+            self.entries[key] = (meta, body)
+            self.size += len(body)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, (_, oud) = self.entries.popitem(last=False)
+                self.size -= len(oud)
+
+    def evict_disk(self):
+        """Verwijdert de oudste bestanden tot de cache op schijf onder max_bytes zit."""
+        with self.lock:
+            files = []
+            total = 0
+            for body_path in self.directory.glob('*.body'):
+                try:
+                    stat = body_path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, body_path))
+                total += stat.st_size
+            for _, size, body_path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                body_path.unlink(missing_ok=True)
+                body_path.with_suffix('.json').unlink(missing_ok=True)
+                total -= size
+
+
+class HttpClient:
+    """requests.Session met connection pooling en optionele (conditionele) caching."""
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, pool_size=HTTP_POOL_SIZE):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.ttl = ttl
+        self.cache = ResponseCache(cache_dir)
+
+    @staticmethod
+    def cache_key(method, url, kwargs):
+        """Sleutel op basis van method, URL, query parameters en request body."""
+        sleutel = json.dumps(
+            [method.upper(), url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data')],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(sleutel.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def cached_response(url, meta, body):
+        """Bouwt een requests.Response uit een cache entry."""
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.headers.update(meta['headers'])
+        response.url = url
+        response.encoding = meta.get('encoding')
+        response._content = body
+        response.from_cache = True
+        return response
+
+    def request(self, method, url, cache=False, ttl=None, **kwargs):
+        """
+        Voert een request uit via de gedeelde sessie. Met cache=True: binnen de TTL
+        een lokale kopie, daarna revalidatie met If-None-Match/If-Modified-Since.
+        """
+        if not cache:
+            return self.session.request(method, url, **kwargs)
+
+        key = self.cache_key(method, url, kwargs)
+        entry = self.cache.get(key)
+        ttl = self.ttl if ttl is None else ttl
+
+        if entry and time.time() - entry[0]['stored_at'] < ttl:
+            return self.cached_response(url, *entry)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry:
+            meta = entry[0]
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = self.session.request(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            meta, body = entry
+            meta = {**meta, 'stored_at': time.time()}
+            self.cache.put(key, meta, body)
+            return self.cached_response(url, meta, body)
+
+        if response.status_code == 200:
+            meta = {
+                'status': response.status_code,
+                'headers': dict(response.headers),
+                'encoding': response.encoding,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'stored_at': time.time(),
+            }
+            self.cache.put(key, meta, response.content)
+
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Geeft de gedeelde HttpClient van dit proces (lazy aangemaakt)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
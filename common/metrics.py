@@ -0,0 +1,83 @@
+"""
+Metingen per stap
+Lichte instrumentatie voor scrapers, processor en webhook listener: tijd per
+stap (spans) en tellers, thread-safe. Het totaal per run komt als JSONB in
+job_runs.stappen; de webhook listener toont zijn metingen op /metrics.
+
+Spans mogen genest zijn (bijv. html_clean binnen extract): elke stap telt zijn
+eigen tijd, dus geneste stappen tellen ook mee in de omliggende stap. Spans in
+parallelle threads tellen allemaal mee, dus het totaal kan langer zijn dan de run.
+
+    metrics = Metrics()
+    with metrics.span('db_write'):
+        ...
+    metrics.count('trello_requests')
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Totale tijd en aantal per stap, en losse tellers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stappen = {}
+        self.tellers = {}
+
+    @contextmanager
+    def span(self, stap):
+        """Meet de tijd van het with-blok als één keer `stap`, ook als het blok een fout gooit."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stap, time.perf_counter() - start)
+
+    def observe(self, stap, seconden):
+        with self.lock:
+            aantal, totaal = self.stappen.get(stap, (0, 0.0))
+            self.stappen[stap] = (aantal + 1, totaal + seconden)
+
+    def count(self, teller, aantal=1):
+        with self.lock:
+            self.tellers[teller] = self.tellers.get(teller, 0) + aantal
+
+    def reset(self):
+        with self.lock:
+            self.stappen = {}
+            self.tellers = {}
+
+    def breakdown(self):
+        """Geeft {'stappen': {stap: {'aantal', 'seconden'}}, 'tellers': {...}} voor job_runs.stappen."""
+        with self.lock:
+            return {
+                'stappen': {
+                    stap: {'aantal': aantal, 'seconden': round(totaal, 4)}
+                    for stap, (aantal, totaal) in sorted(self.stappen.items())
+                },
+                'tellers': dict(sorted(self.tellers.items())),
+            }
+
+    def summary(self):
+        """Korte regel voor in de log: de stappen met de meeste tijd eerst."""
+        with self.lock:
+            stappen = sorted(self.stappen.items(), key=lambda item: -item[1][1])
+        return ', '.join(f"{stap} {totaal:.2f}s ({aantal}x)" for stap, (aantal, totaal) in stappen)
+
+    def prometheus(self, prefix):
+        """De metingen in het Prometheus tekstformaat (alle waarden zijn totalen sinds de start)."""
+        with self.lock:
+            stappen = sorted(self.stappen.items())
+            tellers = sorted(self.tellers.items())
+        regels = [
+            f"# TYPE {prefix}_stap_seconds_total counter",
+            *(f'{prefix}_stap_seconds_total{{stap="{stap}"}} {totaal:.6f}' for stap, (_, totaal) in stappen),
+            f"# TYPE {prefix}_stap_total counter",
+            *(f'{prefix}_stap_total{{stap="{stap}"}} {aantal}' for stap, (aantal, _) in stappen),
+        ]
+        for teller, aantal in tellers:
+            regels += [f"# TYPE {prefix}_{teller}_total counter", f"{prefix}_{teller}_total {aantal}"]
+        return '\n'.join(regels) + '\n'
@@ -0,0 +1,45 @@
+"""
+Rate limiting
+Thread-safe token bucket voor API's met een limiet per tijdvenster (zoals Trello).
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Maximaal `capacity` requests per `period` seconden, met bursts tot `capacity`.
+    pause() legt de bucket tijdelijk stil, bijv. na een 429 met Retry-After.
+    """
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blokkeert tot er een token beschikbaar is en neemt die."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Geeft `seconds` lang geen tokens uit en begint daarna met een lege bucket."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
@@ -0,0 +1,66 @@
+"""
+Werkdagen
+Kalender van Nederlandse werkdagen (geen weekend, geen feestdag) voor de due
+dates van Trello kaarten. De werkdagen van een aantal jaren staan als gesorteerde
+lijst van ordinals klaar, dus "N werkdagen na D" is één binary search in plaats
+van dag voor dag tellen en feestdagen opnieuw opbouwen. Thread-safe.
+
+    add_workdays(date.today(), 2)
+"""
+
+import threading
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+import holidays
+
+# De kalender loopt van vorig jaar tot zoveel jaar vooruit en groeit vanzelf mee
+WORKDAY_YEARS_AHEAD = 5
+
+
+class WorkdayCalendar:
+    """Alle werkdagen van `start_year` t/m `end_year`, als gesorteerde ordinals."""
+
+    def __init__(self, start_year, end_year):
+        self.start_year = start_year
+        self.end_year = end_year
+        feestdagen = holidays.Netherlands(years=range(start_year, end_year + 1))
+        eerste = date(start_year, 1, 1).toordinal()
+        laatste = date(end_year, 12, 31).toordinal()
+        self.ordinals = [
+            ordinal for ordinal in range(eerste, laatste + 1)
+            if date.fromordinal(ordinal).weekday() < 5 and date.fromordinal(ordinal) not in feestdagen
+        ]
+
+    def covers(self, eerste, laatste, days):
+        """True als add() voor startdatums van `eerste` t/m `laatste` zeker binnen de kalender valt."""
+        # Een jaar heeft ruim 250 werkdagen; een jaar marge na het verste resultaat
+        return self.start_year <= eerste.year and laatste.year + days // 250 + 1 <= self.end_year
+
+    def add(self, start, days):
+        """De datum `days` werkdagen na `start` (start zelf telt niet mee)."""
+        if days <= 0:
+            return start
+        return date.fromordinal(self.ordinals[bisect_right(self.ordinals, start.toordinal()) + days - 1])
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_calendar(start, days=0):
+    """De gedeelde kalender, opnieuw opgebouwd als de startdatum (+ `days`) erbuiten valt."""
+    global _calendar
+    with _calendar_lock:
+        if _calendar is None or not _calendar.covers(start, start, days):
+            _calendar = WorkdayCalendar(
+                min(start.year, date.today().year) - 1,
+                max(start.year, date.today().year) + days // 250 + WORKDAY_YEARS_AHEAD
+            )
+        return _calendar
+
+
+@lru_cache(maxsize=1024)
+def add_workdays(start, days):
+    """De datum `days` werkdagen na `start`, onthouden per (datum, aantal)."""
+    return get_calendar(start, days=days).add(start, days)
@@ -0,0 +1,341 @@
+"""
+Portal Scraper Basis
+Gemeenschappelijke interface voor alle portal scrapers: pagina's ophalen,
+vacature details extraheren en de run vastleggen in scrape_runs en job_runs.
+"""
+
+import hashlib
+import os
+import time
+import threading
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import requests
+from dotenv import load_dotenv
+import psycopg2
+from psycopg2.extras import Json, execute_values
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.metrics import Metrics  # noqa: E402
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+# Incrementele runs stoppen bij de eerste pagina met alleen bekende vacatures;
+# eens per zoveel uur volgt een volledige sweep om achterblijvers te vangen.
+FULL_SWEEP_HOURS = float(os.getenv('SCRAPE_FULL_SWEEP_HOURS', '24'))
+# Incrementeel: stoppen na zoveel pagina's op rij met alleen bekende vacatures
+KNOWN_PAGES_TO_STOP = int(os.getenv('SCRAPE_KNOWN_PAGES', '3'))
+
+
+class RateLimiter:
+    """Laat maximaal `per_second` requests per seconde door, ook vanuit meerdere threads."""
+
+    def __init__(self, per_second=None):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Blokkeert tot de volgende request volgens de limiet mag."""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class PortalScraper:
+    """
+    Basisklasse voor een portal scraper.
+    Subklassen zetten `portal_id` en implementeren fetch_pages(), job_url() en
+    extract_job_details(); run() regelt de database en de run-logging.
+    """
+
+    portal_id = None
+    # Maximaal aantal requests per seconde naar de portal (None = geen limiet).
+    # Overschrijfbaar via SCRAPE_RATE_<PORTAL_ID> in .env.
+    max_requests_per_second = None
+    # Een incrementele run stopt na zoveel pagina's op rij met alleen bekende
+    # vacatures. Dat vereist geen sortering op datum van de portal: nieuwe vacatures
+    # tussen bekende pagina's vindt in het ergste geval de volgende volledige sweep.
+    known_pages_to_stop = KNOWN_PAGES_TO_STOP
+
+    def __init__(self):
+        rate = os.getenv(f'SCRAPE_RATE_{self.portal_id}', self.max_requests_per_second)
+        self.rate_limiter = RateLimiter(float(rate) if rate else None)
+        self.incremental = False
+        # Tijd per stap van deze run, komt in job_runs.stappen
+        self.metrics = Metrics()
+
+    def fetch_pages(self):
+        """
+        Generator: levert per opgehaalde pagina een lijst met ruwe vacatures.
+        Bij self.incremental pagina voor pagina (in de volgorde van de portal),
+        zodat run() kan stoppen zonder overbodige requests.
+        """
+        raise NotImplementedError
+
+    def job_url(self, job):
+        """Geeft de vacature URL zonder dure parsing, of None als de vacature onbruikbaar is."""
+        raise NotImplementedError
+
+    def extract_job_details(self, job):
+        """Extraheert de kolommen voor de tabel vacatures uit een ruwe vacature."""
+        raise NotImplementedError
+
+    def load_known_urls(self, cur):
+        """Haalt alle al opgeslagen vacature URLs van deze portal op."""
+        cur.execute("SELECT url FROM vacatures WHERE portal_id = %s", (self.portal_id,))
+        return {row[0] for row in cur.fetchall()}
+
+    def save_page(self, cur, jobs, known_urls):
+        """
+        Slaat de nieuwe vacatures van een pagina op. Geeft (gevonden, nieuw) terug.
+        Bekende URLs worden overgeslagen voordat de beschrijving geparsed wordt.
+        Eén bulk INSERT voor de beschrijvingen, één voor de vacatures en één voor
+        de SCRAPED events per pagina.
+        """
+        aantal_gevonden = 0
+        rows = []
+        beschrijvingen = {}
+        for job in jobs:
+            url = self.job_url(job)
+            if not url:
+                continue
+
+            aantal_gevonden += 1
+            if url in known_urls:
+                continue
+
+            with self.metrics.span('extract'):
+                job_details = self.extract_job_details(job)
+            beschrijving_hash = None
+            if job_details['beschrijving']:
+                beschrijving_hash = hashlib.sha256(job_details['beschrijving'].encode('utf-8')).digest()
+                beschrijvingen[beschrijving_hash] = job_details['beschrijving']
+            rows.append((
+                str(uuid.uuid4()),
+                self.portal_id,
+                job_details['url'],
+                job_details['titel'],
+                job_details['organisatie'],
+                job_details['locatie'],
+                job_details['uren_per_week'],
+                job_details['tarief'],
+                job_details['deadline'],
+                beschrijving_hash
+            ))
+
+        if not rows:
+            print(f"[{self.portal_id}] Pagina: {aantal_gevonden} gevonden, allemaal al bekend")
+            return aantal_gevonden, 0
+
+        with self.metrics.span('db_write'):
+            if beschrijvingen:
+                # Gesorteerd op hash: parallelle scrapers locken dezelfde teksten in dezelfde volgorde
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO beschrijvingen (hash, tekst) VALUES %s
+                    ON CONFLICT (hash) DO NOTHING
+                    """,
+                    sorted(beschrijvingen.items()),
+                    page_size=len(beschrijvingen)
+                )
+
+            nieuw = execute_values(
+                cur,
+                """
+                INSERT INTO vacatures (
+                    vacature_id, portal_id, url, titel, organisatie,
+                    locatie, uren_per_week, tarief, deadline, beschrijving_hash
+                ) VALUES %s
+                ON CONFLICT (portal_id, url) DO NOTHING
+                RETURNING vacature_id, titel
+                """,
+                rows,
+                page_size=len(rows),
+                fetch=True
+            )
+
+            if nieuw:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO vacature_events (vacature_id, event_type, bron)
+                    VALUES %s
+                    """,
+                    [(vacature_id, f"scraper:{self.portal_id}") for vacature_id, _ in nieuw],
+                    template="(%s, 'SCRAPED', %s)",
+                    page_size=len(nieuw)
+                )
+
+        known_urls.update(row[2] for row in rows)
+
+        for _, titel in nieuw:
+            print(f"[{self.portal_id}] Nieuw: {titel}")
+        print(f"[{self.portal_id}] Pagina: {aantal_gevonden} gevonden, "
+              f"{aantal_gevonden - len(nieuw)} bestonden al")
+
+        return aantal_gevonden, len(nieuw)
+
+    def needs_full_sweep(self, cur):
+        """Bepaalt via scrape_state of het tijd is voor een volledige sweep."""
+        cur.execute(
+            "SELECT laatste_volledige_sweep FROM scrape_state WHERE portal_id = %s",
+            (self.portal_id,)
+        )
+        row = cur.fetchone()
+        if not row or not row[0]:
+            return True
+        return datetime.now(timezone.utc) - row[0] >= timedelta(hours=FULL_SWEEP_HOURS)
+
+    def save_state(self, cur, full_sweep, aantal_nieuw):
+        """Werkt de high-water mark van deze portal bij in scrape_state."""
+        cur.execute(
+            """
+            INSERT INTO scrape_state (portal_id, laatste_run, laatste_volledige_sweep, laatste_nieuw_op)
+            VALUES (%s, NOW(), CASE WHEN %s THEN NOW() END, CASE WHEN %s > 0 THEN NOW() END)
+            ON CONFLICT (portal_id) DO UPDATE SET
+                laatste_run = EXCLUDED.laatste_run,
+                laatste_volledige_sweep = COALESCE(EXCLUDED.laatste_volledige_sweep,
+                                                   scrape_state.laatste_volledige_sweep),
+                laatste_nieuw_op = COALESCE(EXCLUDED.laatste_nieuw_op, scrape_state.laatste_nieuw_op)
+            """,
+            (self.portal_id, full_sweep, aantal_nieuw)
+        )
+
+    def start_runs(self, cur):
+        """Registreert de run in scrape_runs (legacy) en job_runs. Geeft beide run_ids terug."""
+        cur.execute(
+            "INSERT INTO scrape_runs (portal_id, start_tijd) VALUES (%s, NOW()) RETURNING run_id",
+            (self.portal_id,)
+        )
+        scrape_run_id = cur.fetchone()[0]
+        cur.execute(
+            """
+            INSERT INTO job_runs (job_type, portal_id, start_tijd, status)
+            VALUES ('SCRAPE', %s, NOW(), 'RUNNING')
+            RETURNING run_id
+            """,
+            (self.portal_id,)
+        )
+        job_run_id = cur.fetchone()[0]
+        return scrape_run_id, job_run_id
+
+    def finish_runs(self, cur, run_ids, aantal_gevonden, aantal_nieuw, error=None):
+        """
+        Rondt de run af in scrape_runs en job_runs, met foutmelding als de run mislukte
+        en de tijd per stap (self.metrics) in job_runs.stappen.
+        """
+        scrape_run_id, job_run_id = run_ids
+        cur.execute(
+            """
+            UPDATE scrape_runs
+            SET eind_tijd = NOW(), aantal_gevonden = %s, aantal_nieuw = %s, foutmelding = %s
+            WHERE run_id = %s
+            """,
+            (aantal_gevonden, aantal_nieuw, error, scrape_run_id)
+        )
+        cur.execute(
+            """
+            UPDATE job_runs
+            SET eind_tijd = NOW(), status = %s,
+                items_processed = %s, items_success = %s, error_message = %s, stappen = %s
+            WHERE run_id = %s
+            """,
+            ('FAILED' if error else 'SUCCESS', aantal_gevonden, aantal_nieuw, error,
+             Json(self.metrics.breakdown()), job_run_id)
+        )
+
+    def fail_runs(self, conn, run_ids, error):
+        """Draait de transactie terug en legt de fout vast in de run-logging."""
+        if not conn:
+            return
+        conn.rollback()
+        if not run_ids:
+            return
+        try:
+            self.finish_runs(conn.cursor(), run_ids, 0, 0, error=str(error))
+            conn.commit()
+        except psycopg2.Error:
+            conn.rollback()
+
+    def run(self, full=False):
+        """
+        Scraped de portal en slaat nieuwe vacatures op. Geeft (gevonden, nieuw) terug.
+        Incrementeel tenzij `full` of de laatste volledige sweep te lang geleden is.
+        """
+        print(f"Start scraping {self.portal_id}...")
+
+        conn = None
+        run_ids = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+            cur = conn.cursor()
+
+            # Run direct committen zodat hij als RUNNING zichtbaar is
+            run_ids = self.start_runs(cur)
+            conn.commit()
+            print(f"[{self.portal_id}] Scrape run gestart met ID: {run_ids[0]}")
+
+            with self.metrics.span('known_urls'):
+                known_urls = self.load_known_urls(cur)
+            print(f"[{self.portal_id}] Al bekende vacatures: {len(known_urls)}")
+
+            full_sweep = full or self.needs_full_sweep(cur)
+            self.incremental = not full_sweep
+            print(f"[{self.portal_id}] Modus: {'volledige sweep' if full_sweep else 'incrementeel'}")
+
+            aantal_gevonden = 0
+            aantal_nieuw = 0
+            bekende_paginas = 0
+            pages = self.fetch_pages()
+            try:
+                while True:
+                    # Wachten op de volgende pagina (ophalen en parsen bij de portal)
+                    with self.metrics.span('fetch'):
+                        jobs = next(pages, None)
+                    if jobs is None:
+                        break
+                    self.metrics.count('paginas')
+                    gevonden, nieuw = self.save_page(cur, jobs, known_urls)
+                    aantal_gevonden += gevonden
+                    aantal_nieuw += nieuw
+
+                    bekende_paginas = bekende_paginas + 1 if gevonden and not nieuw else 0
+                    if self.incremental and bekende_paginas >= self.known_pages_to_stop:
+                        print(f"[{self.portal_id}] {bekende_paginas} pagina('s) op rij met alleen "
+                              f"bekende vacatures, klaar")
+                        break
+            finally:
+                pages.close()
+
+            self.save_state(cur, full_sweep, aantal_nieuw)
+            self.finish_runs(cur, run_ids, aantal_gevonden, aantal_nieuw)
+            conn.commit()
+            print(f"[{self.portal_id}] Klaar! Gevonden: {aantal_gevonden}, Nieuw: {aantal_nieuw}")
+            print(f"[{self.portal_id}] Stappen: {self.metrics.summary()}")
+            return aantal_gevonden, aantal_nieuw
+
+        except requests.exceptions.RequestException as e:
+            print(f"[{self.portal_id}] API fout: {e}")
+            self.fail_runs(conn, run_ids, e)
+            raise
+        except psycopg2.Error as e:
+            print(f"[{self.portal_id}] Database fout: {e}")
+            self.fail_runs(conn, run_ids, e)
+            raise
+        except Exception as e:
+            print(f"[{self.portal_id}] Onverwachte fout: {e}")
+            self.fail_runs(conn, run_ids, e)
+            raise
+        finally:
+            if conn:
+                conn.close()
@@ -4,19 +4,25 @@ Scraped vacatures van harveynash.nl en slaat ze op in PostgreSQL.
 """
 
 import os
-import uuid
 import re
+import sys
+import html
+from html.entities import html5
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
+from pathlib import Path
 from dotenv import load_dotenv
-import psycopg2
-from psycopg2.extras import execute_values
+from base import PortalScraper
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.http_client import get_client  # noqa: E402
 
 load_dotenv()
 
-DATABASE_URL = os.getenv('DATABASE_URL')
 PORTAL_ID = 'NASH'
+JOBS_PER_PAGE = 100
+SCRAPE_CONCURRENCY = int(os.getenv('SCRAPE_CONCURRENCY', '8'))
 
 API_URL = "https://www.harveynash.nl/_sf/api/v1/jobs/search.json"
 API_HEADERS = {
@@ -70,26 +76,178 @@ def validate_api_response(data):
     return True
 
 
+def job_url(url_slug):
+    """Bouwt de vacature URL op basis van de url_slug uit de API."""
+    return f"https://www.harveynash.nl/vacatures/{url_slug}"
+
+
+def fetch_page(offset, jobs_per_page=JOBS_PER_PAGE):
+    """Haalt een pagina vacatures op bij de HarveyNash API (gecached, zie common/http_client)."""
+    response = get_client().post(
+        API_URL,
+        headers=API_HEADERS,
+        json=get_request_body(offset, jobs_per_page),
+        timeout=30,
+        cache=True
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+# Markering per tag: (volgorde, prefix, suffix). De volgorde volgt de oude
+# BeautifulSoup-passes (br/p, li, strong/b, em/i): een tag krijgt alleen een
+# markering als geen voorouder een markering met een lagere of gelijke volgorde
+# heeft, anders is hij in de oude variant al als platte tekst opgegaan.
+HTML_MARKERS = {
+    'br': (1, '\n', '\n'),
+    'p': (1, '\n', '\n'),
+    'li': (2, '\n• ', ''),
+    'strong': (3, '*', '*'),
+    'b': (3, '*', '*'),
+    'em': (4, '_', '_'),
+    'i': (4, '_', '_'),
+}
+VOID_TAGS = {
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed',
+    'frame', 'hr', 'image', 'img', 'input', 'isindex', 'keygen', 'link',
+    'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr'
+}
+HIDDEN_TEXT_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+PRESERVE_WHITESPACE_TAGS = {'pre', 'textarea'}
+ASCII_SPACES = ' \n\t\x0c\r'
+NUMERIC_CHARREF = re.compile(r'^([xX][0-9a-fA-F]+|[0-9]+)(.*)$', re.DOTALL)
+
+
+class MaxLengthReached(Exception):
+    """Intern signaal: de tekst is al langer dan max_length, stoppen met parsen."""
+
+
+class HtmlTextParser(HTMLParser):
+    """
+    Zet HTML in één pass om naar tekst, met dezelfde uitvoer als de
+    oorspronkelijke BeautifulSoup-variant van clean_html_text.
+    """
+
+    def __init__(self, max_length):
+        super().__init__(convert_charrefs=False)
+        self.max_length = max_length
+        self.stack = []
+        self.already_closed = []
+        self.data = []
+        self.line = []
+        self.lines = []
+        self.length = 0
+
+    def emit(self, text):
+        """Voegt tekst toe en houdt de genormaliseerde lengte bij."""
+        *complete, rest = text.split('\n')
+        for part in complete:
+            self.line.append(part)
+            line = ''.join(self.line).strip()
+            self.line = []
+            if line:
+                self.length += len(line) + (1 if self.lines else 0)
+                self.lines.append(line)
+        self.line.append(rest)
+        if self.length > self.max_length:
+            raise MaxLengthReached()
+
+    def end_data(self):
+        """Sluit een stuk tekst af zoals BeautifulSoup dat doet."""
+        if not self.data:
+            return
+        text = ''.join(self.data)
+        self.data = []
+        if any(tag in HIDDEN_TEXT_TAGS for tag, _, _ in self.stack):
+            return
+        if not any(tag in PRESERVE_WHITESPACE_TAGS for tag, _, _ in self.stack):
+            if not text.strip(ASCII_SPACES):
+                text = '\n' if '\n' in text else ' '
+        self.emit(text)
+
+    def handle_starttag(self, tag, attrs, handle_void=True):
+        self.end_data()
+        level = self.stack[-1][1] if self.stack else len(HTML_MARKERS)
+        marker = HTML_MARKERS.get(tag)
+        live = marker is not None and marker[0] < level
+        if marker:
+            level = min(level, marker[0])
+        self.stack.append((tag, level, live))
+        if live:
+            self.emit(marker[1])
+        if handle_void and tag in VOID_TAGS:
+            self.handle_endtag(tag, check_already_closed=False)
+            self.already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_void=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self.already_closed:
+            self.already_closed.remove(tag)
+            return
+        self.end_data()
+        if not any(open_tag == tag for open_tag, _, _ in self.stack):
+            return
+        while self.pop_tag() != tag:
+            pass
+
+    def pop_tag(self):
+        tag, _, live = self.stack.pop()
+        if live:
+            self.emit(HTML_MARKERS[tag][2])
+        return tag
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_entityref(self, name):
+        self.data.append(html5.get(name + ';') or html5.get(name) or f"&{name}")
+
+    def handle_charref(self, name):
+        match = NUMERIC_CHARREF.match(name)
+        if match:
+            self.data.append(html.unescape(f"&#{match.group(1)};") + match.group(2))
+        else:
+            self.data.append(name)
+
+    def handle_comment(self, data):
+        self.end_data()
+
+    def handle_decl(self, decl):
+        self.end_data()
+
+    def handle_pi(self, data):
+        self.end_data()
+
+    def unknown_decl(self, data):
+        self.end_data()
+        if data.upper().startswith('CDATA['):
+            self.data.append(data[len('CDATA['):])
+            self.end_data()
+
+    def text(self):
+        """Sluit het document af en geeft de genormaliseerde tekst terug."""
+        self.end_data()
+        while self.stack:
+            self.pop_tag()
+        self.emit('\n')
+        return '\n'.join(self.lines)
+
+
 def clean_html_text(html_text, max_length=10000):
-    """Verwijdert HTML tags en formatteert de tekst netjes."""
+    """Verwijdert HTML tags en formatteert de tekst netjes (single-pass, stopt na max_length)."""
     if not html_text:
         return ""
     
-    soup = BeautifulSoup(html_text, 'html.parser')
-    
-    for br in soup.find_all(['br', 'p']):
-        br.replace_with('\n' + br.get_text() + '\n')
-    
-    for li in soup.find_all('li'):
-        li.replace_with('\n• ' + li.get_text())
-    
-    for strong in soup.find_all(['strong', 'b']):
-        strong.replace_with('*' + strong.get_text() + '*')
-    for em in soup.find_all(['em', 'i']):
-        em.replace_with('_' + em.get_text() + '_')
-    
-    text = soup.get_text()
-    text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+    parser = HtmlTextParser(max_length)
+    try:
+        parser.feed(html_text)
+        parser.close()
+        text = parser.text()
+    except MaxLengthReached:
+        text = '\n'.join(parser.lines)
     
     if len(text) > max_length:
         text = text[:max_length] + '...'
@@ -97,8 +255,11 @@ def clean_html_text(html_text, max_length=10000):
     return text
 
 
-def extract_job_details(job_data):
-    """Extraheert alle relevante vacature details uit de API response."""
+def extract_job_details(job_data, cleaned_description=None):
+    """
+    Extraheert alle relevante vacature details uit de API response.
+    `cleaned_description` is de al opgeschoonde beschrijving, als de aanroeper die al heeft.
+    """
     addresses = job_data.get('addresses', [])
     derived_info = job_data.get('derived_info', {})
     
@@ -108,7 +269,8 @@ def extract_job_details(job_data):
     elif derived_info.get('location'):
         location = derived_info['location']
     
-    cleaned_description = clean_html_text(job_data.get('description', ''))
+    if cleaned_description is None:
+        cleaned_description = clean_html_text(job_data.get('description', ''))
     
     organisatie = None
     patroon = r"[Vv]oor (?:onze (?:eindklant|klant) )?([^\n,]+?)(?=\s+(?:in|is|te|bij))"
@@ -141,7 +303,7 @@ def extract_job_details(job_data):
             pass
     
     return {
-        "url": f"https://www.harveynash.nl/vacatures/{job_data.get('url_slug')}",
+        "url": job_url(job_data.get('url_slug')),
         "titel": job_data.get('title', ''),
         "organisatie": organisatie,
         "locatie": location,
@@ -152,136 +314,79 @@ def extract_job_details(job_data):
     }
 
 
-def scrape_harveynash():
-    """Hoofdfunctie: scraped HarveyNash en slaat op in PostgreSQL."""
-    print(f"Start scraping {PORTAL_ID}...")
-    
-    conn = None
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
+class HarveyNashScraper(PortalScraper):
+    """Scraper voor de zoek-API van harveynash.nl."""
+
+    portal_id = PORTAL_ID
+    max_requests_per_second = 10
+
+    def fetch(self, offset):
+        """Haalt een pagina op, binnen de rate limit van de portal."""
+        with self.metrics.span('rate_limit_wait'):
+            self.rate_limiter.wait()
+        self.metrics.count('http_requests')
+        with self.metrics.span('http_fetch'):
+            return fetch_page(offset)
+
+    def fetch_pages(self):
+        """
+        Haalt de eerste pagina op voor total_size. Bij een volledige sweep worden de
+        overige offsets tegelijk opgehaald (max SCRAPE_CONCURRENCY) en komen pagina's
+        binnen in volgorde van aankomst; incrementeel pagina voor pagina.
+        """
+        data = self.fetch(0)
+        validate_api_response(data)
         
-        cur.execute(
-            "INSERT INTO scrape_runs (portal_id, start_tijd) VALUES (%s, NOW()) RETURNING run_id",
-            (PORTAL_ID,)
-        )
-        run_id = cur.fetchone()[0]
-        print(f"Scrape run gestart met ID: {run_id}")
+        total_jobs = data.get('total_size', 0)
+        print(f"Totaal aantal vacatures via API: {total_jobs}")
         
-        offset = 0
-        total_jobs = None
-        jobs_per_page = 100
-        aantal_gevonden = 0
-        aantal_nieuw = 0
+        if total_jobs == 0:
+            raise ValueError("API rapporteert 0 beschikbare vacatures")
         
-        while total_jobs is None or offset < total_jobs:
-            response = requests.post(
-                API_URL, 
-                headers=API_HEADERS, 
-                json=get_request_body(offset, jobs_per_page),
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            validate_api_response(data)
-            
-            if total_jobs is None:
-                total_jobs = data.get('total_size', 0)
-                print(f"Totaal aantal vacatures via API: {total_jobs}")
-                
-                if total_jobs == 0:
-                    raise ValueError("API rapporteert 0 beschikbare vacatures")
-            
-            for result in data.get('results', []):
-                job = result.get('job', {})
-                
-                if not job.get('title') or not job.get('url_slug'):
-                    continue
-                
-                aantal_gevonden += 1
-                job_details = extract_job_details(job)
-                
-                cur.execute(
-                    "SELECT vacature_id FROM vacatures WHERE portal_id = %s AND url = %s",
-                    (PORTAL_ID, job_details['url'])
-                )
-                existing = cur.fetchone()
-                
-                if existing:
-                    print(f"Bestaat al: {job_details['url']}")
-                    continue
-                
-                vacature_id = uuid.uuid4()
-                
-                cur.execute(
-                    """
-                    INSERT INTO vacatures (
-                        vacature_id, portal_id, url, titel, organisatie, 
-                        locatie, uren_per_week, tarief, deadline, beschrijving
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (
-                        str(vacature_id),
-                        PORTAL_ID,
-                        job_details['url'],
-                        job_details['titel'],
-                        job_details['organisatie'],
-                        job_details['locatie'],
-                        job_details['uren_per_week'],
-                        job_details['tarief'],
-                        job_details['deadline'],
-                        job_details['beschrijving']
-                    )
-                )
-                
-                cur.execute(
-                    """
-                    INSERT INTO vacature_events (vacature_id, event_type, bron)
-                    VALUES (%s, 'SCRAPED', %s)
-                    """,
-                    (str(vacature_id), f"scraper:{PORTAL_ID}")
-                )
-                
-                aantal_nieuw += 1
-                print(f"Nieuw: {job_details['titel']}")
-            
-            offset += jobs_per_page
-            
-            if not data.get('results'):
-                break
+        yield [result.get('job', {}) for result in data['results']]
         
-        cur.execute(
-            """
-            UPDATE scrape_runs 
-            SET eind_tijd = NOW(), aantal_gevonden = %s, aantal_nieuw = %s
-            WHERE run_id = %s
-            """,
-            (aantal_gevonden, aantal_nieuw, run_id)
-        )
+        offsets = range(JOBS_PER_PAGE, total_jobs, JOBS_PER_PAGE)
+        if not offsets:
+            return
         
-        conn.commit()
-        print(f"Klaar! Gevonden: {aantal_gevonden}, Nieuw: {aantal_nieuw}")
+        if self.incremental:
+            for offset in offsets:
+                data = self.fetch(offset)
+                if not data.get('results'):
+                    return
+                
+                validate_api_response(data)
+                yield [result.get('job', {}) for result in data['results']]
+            return
         
-    except requests.exceptions.RequestException as e:
-        print(f"API fout: {e}")
-        if conn:
-            conn.rollback()
-        raise
-    except psycopg2.Error as e:
-        print(f"Database fout: {e}")
-        if conn:
-            conn.rollback()
-        raise
-    except Exception as e:
-        print(f"Onverwachte fout: {e}")
-        if conn:
-            conn.rollback()
-        raise
-    finally:
-        if conn:
-            conn.close()
+        pool = ThreadPoolExecutor(max_workers=SCRAPE_CONCURRENCY)
+        try:
+            futures = [pool.submit(self.fetch, offset) for offset in offsets]
+            for future in as_completed(futures):
+                data = future.result()
+                if not data.get('results'):
+                    continue
+                
+                validate_api_response(data)
+                yield [result.get('job', {}) for result in data['results']]
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def job_url(self, job):
+        if not job.get('title') or not job.get('url_slug'):
+            return None
+        return job_url(job['url_slug'])
+
+    def extract_job_details(self, job):
+        with self.metrics.span('html_clean'):
+            beschrijving = clean_html_text(job.get('description', ''))
+        return extract_job_details(job, beschrijving)
+
+
+def scrape_harveynash(full=False):
+    """Hoofdfunctie: scraped HarveyNash en slaat op in PostgreSQL."""
+    return HarveyNashScraper().run(full=full)
 
 
 if __name__ == "__main__":
-    scrape_harveynash()
+    scrape_harveynash(full='--full' in sys.argv[1:])
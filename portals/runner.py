@@ -0,0 +1,91 @@
+"""
+Portal Runner
+Scraped alle actieve portals uit de tabel portals tegelijk, elk in een eigen proces.
+Elke scraper houdt zijn eigen rate limit aan richting de portal.
+
+Gebruik:
+  python portals/runner.py                 - Alle actieve portals
+  python portals/runner.py NASH C8         - Alleen deze portals (mits actief)
+  python portals/runner.py --full          - Volledige sweep afdwingen (anders incrementeel)
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dotenv import load_dotenv
+import psycopg2
+
+from nash import HarveyNashScraper
+from ssr import Circle8Scraper, SevenStarsScraper
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Portal ID -> scraper klasse. Een nieuwe portal aansluiten = hier registreren.
+SCRAPERS = {
+    HarveyNashScraper.portal_id: HarveyNashScraper,
+    Circle8Scraper.portal_id: Circle8Scraper,
+    SevenStarsScraper.portal_id: SevenStarsScraper,
+}
+
+
+def get_active_portals():
+    """Haalt de portal_ids op van alle actieve portals."""
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT portal_id FROM portals WHERE is_actief = TRUE ORDER BY portal_id")
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def run_portal(portal_id, full=False):
+    """Draait de scraper van een portal (in een eigen proces). Geeft (gevonden, nieuw) terug."""
+    return SCRAPERS[portal_id]().run(full=full)
+
+
+def run_all(only=None, full=False):
+    """Scraped alle actieve portals parallel. Geeft {portal_id: (gevonden, nieuw) of fout} terug."""
+    portal_ids = get_active_portals()
+    if only:
+        portal_ids = [p for p in portal_ids if p in only]
+
+    runnable = []
+    for portal_id in portal_ids:
+        if portal_id in SCRAPERS:
+            runnable.append(portal_id)
+        else:
+            print(f"Geen Python scraper voor portal {portal_id}, overgeslagen")
+
+    if not runnable:
+        print("Niets te scrapen.")
+        return {}
+
+    print(f"Start parallel scrapen van {len(runnable)} portal(s): {', '.join(runnable)}")
+    results = {}
+    with ProcessPoolExecutor(max_workers=len(runnable)) as pool:
+        futures = {pool.submit(run_portal, portal_id, full): portal_id for portal_id in runnable}
+        for future in as_completed(futures):
+            portal_id = futures[future]
+            try:
+                results[portal_id] = future.result()
+            except Exception as e:
+                results[portal_id] = e
+
+    print("\nResultaat per portal:")
+    for portal_id, result in sorted(results.items()):
+        if isinstance(result, Exception):
+            print(f"  ✗ {portal_id}: {result}")
+        else:
+            print(f"  ✓ {portal_id}: gevonden {result[0]}, nieuw {result[1]}")
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    only = {arg for arg in args if not arg.startswith('--')}
+    results = run_all(only=only or None, full='--full' in args)
+    if any(isinstance(result, Exception) for result in results.values()):
+        sys.exit(1)
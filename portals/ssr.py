@@ -0,0 +1,205 @@
+"""
+SSR Portals (Circle8, Seven Stars)
+Laadt de uitvoer van tools/ssr-scraper/scrape.js in PostgreSQL via de gedeelde
+PortalScraper pipeline (bulk INSERT ... ON CONFLICT + SCRAPED events).
+
+De vacatures worden gestreamd: uit een scrape.js JSON bestand (element voor
+element), als NDJSON van stdin, of rechtstreeks uit een scrape.js proces.
+
+Gebruik:
+  python portals/ssr.py circle8                  - Draai scrape.js en laad direct in
+  python portals/ssr.py circle8 <bestand.json>   - Laad een bestaand scrape.js bestand
+  node scrape.js circle8 20 --ndjson | python portals/ssr.py circle8 -
+Met --full wordt een volledige sweep afgedwongen (anders incrementeel).
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+from base import PortalScraper
+
+load_dotenv()
+
+SSR_SCRAPER_DIR = Path(__file__).resolve().parent.parent / 'tools' / 'ssr-scraper'
+SSR_DETAIL_LIMIT = int(os.getenv('SSR_DETAIL_LIMIT', '5'))
+SSR_BATCH_SIZE = 500
+READ_CHUNK_SIZE = 64 * 1024
+
+JOBS_ARRAY_START = re.compile(r'"jobs"\s*:\s*\[')
+
+
+def iter_json_jobs(f):
+    """
+    Leest de "jobs" array uit een scrape.js JSON bestand, één vacature per keer,
+    zonder het hele bestand in het geheugen te laden.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    eof = False
+
+    def read_more():
+        nonlocal buf, eof
+        chunk = f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buf += chunk
+
+    match = None
+    while not match:
+        read_more()
+        match = JOBS_ARRAY_START.search(buf)
+        if eof and not match:
+            raise ValueError("Geen 'jobs' array gevonden in scrape.js uitvoer")
+    buf = buf[match.end():]
+
+    while True:
+        stripped = buf.lstrip().lstrip(',').lstrip()
+        if not stripped and not eof:
+            read_more()
+            continue
+        buf = stripped
+        if buf.startswith(']'):
+            return
+        try:
+            job, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            read_more()
+            continue
+        yield job
+        buf = buf[end:]
+
+
+def iter_ndjson_jobs(lines):
+    """Leest vacatures als NDJSON: één JSON object per regel."""
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def batched(items, size):
+    """Groepeert een iterator in lijsten van maximaal `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def meta_value(meta, *keys):
+    """Zoekt de eerste gevulde waarde in de metadata van een vacature (hoofdletterongevoelig)."""
+    lowered = {key.lower().rstrip(':'): value for key, value in (meta or {}).items()}
+    for key in keys:
+        value = lowered.get(key.lower())
+        if value:
+            return value[:100]
+    return None
+
+
+class SsrScraper(PortalScraper):
+    """
+    Scraper voor portals die via tools/ssr-scraper/scrape.js gescraped worden.
+    `source` is None (scrape.js zelf draaien), '-' (NDJSON van stdin) of een pad.
+    """
+
+    site = None
+
+    def __init__(self, source=None):
+        super().__init__()
+        self.source = source
+
+    def iter_jobs(self):
+        """Levert de ruwe vacatures uit de gekozen bron, één voor één."""
+        if self.source == '-':
+            yield from iter_ndjson_jobs(sys.stdin)
+            return
+
+        if self.source:
+            with open(self.source, encoding='utf-8') as f:
+                if str(self.source).endswith('.ndjson'):
+                    yield from iter_ndjson_jobs(f)
+                else:
+                    yield from iter_json_jobs(f)
+            return
+
+        process = subprocess.Popen(
+            ['node', 'scrape.js', self.site, str(SSR_DETAIL_LIMIT), '--ndjson'],
+            cwd=SSR_SCRAPER_DIR,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding='utf-8'
+        )
+        try:
+            yield from iter_ndjson_jobs(process.stdout)
+        except GeneratorExit:
+            # Incrementele run is vroeg gestopt: scrape.js hoeft niet verder
+            process.terminate()
+            raise
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"scrape.js {self.site} stopte met exit code {returncode}")
+
+    def fetch_pages(self):
+        yield from batched(self.iter_jobs(), SSR_BATCH_SIZE)
+
+    def job_url(self, job):
+        # Vacatures waarvan de detailpagina mislukte slaan we over; die komen
+        # bij een volgende run opnieuw langs (vacatures zijn onveranderlijk).
+        if job.get('error') or not job.get('title') or not job.get('url'):
+            return None
+        return job['url']
+
+    def extract_job_details(self, job):
+        meta = job.get('meta')
+        return {
+            "url": job['url'],
+            "titel": job['title'][:500],
+            "organisatie": meta_value(meta, 'Opdrachtgever', 'Organisatie', 'Klant'),
+            "locatie": meta_value(meta, 'Locatie', 'Standplaats', 'Plaats'),
+            "uren_per_week": meta_value(meta, 'Uren per week', 'Uren', 'Aantal uur'),
+            "tarief": meta_value(meta, 'Tarief', 'Uurtarief'),
+            "deadline": None,
+            "beschrijving": job.get('description')
+        }
+
+
+class Circle8Scraper(SsrScraper):
+    """Circle8 (circle8.nl) via scrape.js."""
+
+    portal_id = 'C8'
+    site = 'circle8'
+
+
+class SevenStarsScraper(SsrScraper):
+    """Seven Stars (sevenstars.nl) via scrape.js."""
+
+    portal_id = 'SEVENSTARS'
+    site = 'sevenstars'
+
+
+SSR_SCRAPERS = {scraper.site: scraper for scraper in (Circle8Scraper, SevenStarsScraper)}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in SSR_SCRAPERS:
+        print("Usage:")
+        print("  python ssr.py <site>              - Draai scrape.js en laad direct in")
+        print("  python ssr.py <site> <bestand>    - Laad een scrape.js JSON/NDJSON bestand")
+        print("  python ssr.py <site> -            - Laad NDJSON van stdin")
+        print(f"Sites: {', '.join(SSR_SCRAPERS)}")
+        sys.exit(1)
+
+    args = [arg for arg in sys.argv[2:] if arg != '--full']
+    source = args[0] if args else None
+    SSR_SCRAPERS[sys.argv[1]](source).run(full='--full' in sys.argv[2:])
@@ -2,6 +2,9 @@
 -- Versie: 1.0
 -- Datum: 30 januari 2026
 
+-- Trigram-indexes voor ILIKE '%...%' op titels en vacatureteksten
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- ============================================================================
 -- DIMENSIE-TABELLEN (beschrijvend, mag geupdate worden)
 -- ============================================================================
@@ -49,10 +52,38 @@ CREATE TABLE trello_lijsten (
 COMMENT ON TABLE trello_lijsten IS 'Dimensie-tabel: mapping van Trello lijst-IDs naar leesbare namen';
 COMMENT ON COLUMN trello_lijsten.volgorde IS 'Positie op het Trello bord voor sortering';
 
+-- Scrape State: High-water mark per portal voor incrementeel scrapen
+CREATE TABLE scrape_state (
+    portal_id               VARCHAR(20) PRIMARY KEY REFERENCES portals(portal_id) ON DELETE CASCADE,
+    laatste_run             TIMESTAMPTZ,
+    laatste_volledige_sweep TIMESTAMPTZ,
+    laatste_nieuw_op        TIMESTAMPTZ,
+    created_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE scrape_state IS 'Dimensie-tabel: scrape-cursor per portal (incrementeel vs. volledige sweep)';
+COMMENT ON COLUMN scrape_state.laatste_volledige_sweep IS 'Laatste run die alle pagina''s heeft opgehaald; ouder dan SCRAPE_FULL_SWEEP_HOURS = volgende run is weer volledig';
+COMMENT ON COLUMN scrape_state.laatste_nieuw_op IS 'Laatste run waarin nieuwe vacatures zijn gevonden';
+
 -- ============================================================================
 -- FACT-TABELLEN (gebeurtenissen, append-only)
 -- ============================================================================
 
+-- Beschrijvingen: Vacatureteksten, één keer opgeslagen per unieke inhoud
+-- Los van vacatures, zodat de werkvoorraad en andere queries op vacatures
+-- alleen smalle rijen lezen. PostgreSQL comprimeert lange teksten zelf (TOAST).
+CREATE TABLE beschrijvingen (
+    hash            BYTEA PRIMARY KEY,
+    tekst           TEXT NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE beschrijvingen IS 'Fact-tabel: vacatureteksten, content-addressed (dezelfde tekst op meerdere portals staat er één keer in)';
+COMMENT ON COLUMN beschrijvingen.hash IS 'SHA-256 van de tekst (UTF-8)';
+
+CREATE INDEX idx_beschrijvingen_tekst_trgm ON beschrijvingen USING GIN (tekst gin_trgm_ops);
+
 -- Vacatures: Alle gescrapete vacatures (onveranderlijk na aanmaken)
 CREATE TABLE vacatures (
     vacature_id     UUID PRIMARY KEY,
@@ -65,7 +96,8 @@ CREATE TABLE vacatures (
     tarief          VARCHAR(100),
     deadline        DATE,
     eerste_gezien_op TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-    beschrijving    TEXT,
+    beschrijving_hash BYTEA REFERENCES beschrijvingen(hash) ON DELETE RESTRICT,
+    zoekvector      TSVECTOR,
 
     CONSTRAINT uq_vacature_url_portal UNIQUE (portal_id, url)
 );
@@ -73,15 +105,21 @@ CREATE TABLE vacatures (
 COMMENT ON TABLE vacatures IS 'Fact-tabel: elke gescrapete vacature (onveranderlijk na aanmaken)';
 COMMENT ON COLUMN vacatures.vacature_id IS 'Extern gegenereerde UUID';
 COMMENT ON COLUMN vacatures.uren_per_week IS 'Optioneel: ruwe waarde uit de API (bijv. "32-40 uur", "Fulltime")';
-COMMENT ON COLUMN vacatures.beschrijving IS 'Optioneel: volledige vacaturetekst voor doorzoekbaarheid en AI-matching';
+COMMENT ON COLUMN vacatures.beschrijving_hash IS 'Optioneel: volledige vacaturetekst (tabel beschrijvingen) voor doorzoekbaarheid en AI-matching';
+COMMENT ON COLUMN vacatures.zoekvector IS 'Full-text (dutch) van titel (gewicht A) en beschrijving (B), gevuld door een trigger bij INSERT';
 
 CREATE INDEX idx_vacatures_portal ON vacatures(portal_id);
 CREATE INDEX idx_vacatures_eerste_gezien ON vacatures(eerste_gezien_op DESC);
 CREATE INDEX idx_vacatures_deadline ON vacatures(deadline) WHERE deadline IS NOT NULL;
+-- Zoeken (GET /search van de webhook listener): full-text en ILIKE op de titel
+CREATE INDEX idx_vacatures_zoekvector ON vacatures USING GIN (zoekvector);
+CREATE INDEX idx_vacatures_titel_trgm ON vacatures USING GIN (titel gin_trgm_ops);
 
 -- Vacature Events: Alle statuswijzigingen en Trello-acties (append-only)
+-- Gepartitioneerd per maand op tijdstip; oude maanden kunnen los gearchiveerd worden
+-- (scripts/event_partitions.py). Een bestaande database omzetten: event_partitions.py migrate
 CREATE TABLE vacature_events (
-    event_id        SERIAL PRIMARY KEY,
+    event_id        SERIAL,
     vacature_id     UUID NOT NULL REFERENCES vacatures(vacature_id) ON DELETE RESTRICT,
     event_type      VARCHAR(30) NOT NULL CHECK (event_type IN (
                         'SCRAPED',
@@ -90,7 +128,8 @@ CREATE TABLE vacature_events (
                         'ADDED_TO_TRELLO',
                         'TRELLO_MOVED',
                         'TRELLO_LABEL_ADDED',
-                        'TRELLO_ARCHIVED'
+                        'TRELLO_ARCHIVED',
+                        'DUPLICATE'
                     )),
     tijdstip        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     bron            VARCHAR(100),
@@ -98,17 +137,104 @@ CREATE TABLE vacature_events (
     trello_lijst_id VARCHAR(50) REFERENCES trello_lijsten(trello_lijst_id) ON DELETE RESTRICT,
     trello_user     VARCHAR(100),
     trello_label    VARCHAR(100),
-    filter_keyword  VARCHAR(200)
-);
+    filter_keyword  VARCHAR(200),
+    duplicaat_van   UUID REFERENCES vacatures(vacature_id) ON DELETE RESTRICT,
+    trello_action_id VARCHAR(50),
 
-COMMENT ON TABLE vacature_events IS 'Fact-tabel: alle statuswijzigingen en Trello-acties (append-only, nooit wijzigen)';
+    PRIMARY KEY (event_id, tijdstip)
+) PARTITION BY RANGE (tijdstip);
+
+COMMENT ON TABLE vacature_events IS 'Fact-tabel: alle statuswijzigingen en Trello-acties (append-only, nooit wijzigen), per maand gepartitioneerd';
 COMMENT ON COLUMN vacature_events.bron IS 'Welk script of proces dit event heeft aangemaakt';
 COMMENT ON COLUMN vacature_events.filter_keyword IS 'Bij FILTERED events: het keyword waarop gefilterd is';
+COMMENT ON COLUMN vacature_events.trello_action_id IS 'Bij webhook events: ID van de Trello actie, zodat herhaalde leveringen en backfills niet dubbel tellen';
+COMMENT ON COLUMN vacature_events.duplicaat_van IS 'Bij DUPLICATE events: de eerder geziene vacature waar deze (bijna) gelijk aan is';
 
-CREATE INDEX idx_events_vacature ON vacature_events(vacature_id);
+-- (vacature_id, tijdstip DESC): tijdlijn en laatste event per vacature zonder sorteren
+CREATE INDEX idx_events_vacature_tijdstip ON vacature_events(vacature_id, tijdstip DESC, event_id DESC);
 CREATE INDEX idx_events_tijdstip ON vacature_events(tijdstip DESC);
 CREATE INDEX idx_events_type ON vacature_events(event_type);
 CREATE INDEX idx_events_trello_card ON vacature_events(trello_card_id) WHERE trello_card_id IS NOT NULL;
+-- Unieke indexes op een gepartitioneerde tabel moeten de partitiesleutel bevatten;
+-- een Trello actie heeft altijd dezelfde datum, dus dit blijft uniek per actie
+CREATE UNIQUE INDEX uq_events_trello_action ON vacature_events(trello_action_id, tijdstip);
+
+-- Events buiten de aangemaakte maanden (bijv. een backfill van lang geleden)
+CREATE TABLE vacature_events_default PARTITION OF vacature_events DEFAULT;
+
+-- Vacature Pipeline: Werkvoorraad, de pipeline-stap van elke vacature (afgeleid van vacature_events)
+CREATE TABLE vacature_pipeline (
+    vacature_id     UUID PRIMARY KEY REFERENCES vacatures(vacature_id) ON DELETE CASCADE,
+    stage           VARCHAR(30) NOT NULL DEFAULT 'SCRAPED' CHECK (stage IN (
+                        'SCRAPED',
+                        'FILTER_PASSED',
+                        'FILTERED',
+                        'DUPLICATE',
+                        'ADDED_TO_TRELLO'
+                    )),
+    eerste_gezien_op TIMESTAMPTZ NOT NULL,
+    stage_sinds     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE vacature_pipeline IS 'Afgeleide tabel: huidige pipeline-stap per vacature, bijgehouden door triggers op vacatures en vacature_events';
+COMMENT ON COLUMN vacature_pipeline.stage IS 'Verste stap in de pipeline; FILTERED, DUPLICATE en ADDED_TO_TRELLO zijn eindstations';
+COMMENT ON COLUMN vacature_pipeline.eerste_gezien_op IS 'Kopie van vacatures.eerste_gezien_op voor keyset paginering van de werkvoorraad';
+
+-- Alleen openstaand werk zit in deze index: klein, ongeacht de omvang van de historie
+CREATE INDEX idx_pipeline_werkvoorraad ON vacature_pipeline(eerste_gezien_op DESC, vacature_id DESC)
+    WHERE stage IN ('SCRAPED', 'FILTER_PASSED');
+
+-- Vacature Status: Laatste event per vacature (projectie van vacature_events, voor v_vacature_status)
+CREATE TABLE vacature_status (
+    vacature_id     UUID PRIMARY KEY REFERENCES vacatures(vacature_id) ON DELETE CASCADE,
+    event_id        INTEGER NOT NULL,
+    event_type      VARCHAR(30) NOT NULL,
+    tijdstip        TIMESTAMPTZ NOT NULL,
+    trello_card_id  VARCHAR(50),
+    trello_lijst_id VARCHAR(50)
+);
+
+COMMENT ON TABLE vacature_status IS 'Afgeleide tabel: laatste event per vacature, bijgehouden door een trigger op vacature_events';
+COMMENT ON COLUMN vacature_status.event_id IS 'Bij gelijke tijdstippen wint het hoogste event_id (zelfde volgorde als de tijdlijn)';
+COMMENT ON COLUMN vacature_status.trello_card_id IS 'Na ADDED_TO_TRELLO heeft elk event de kaart, dus dit is de kaart van de vacature';
+
+-- Kaart -> vacature zonder de (gepartitioneerde, deels gearchiveerde) events te doorzoeken
+CREATE INDEX idx_status_trello_card ON vacature_status(trello_card_id) WHERE trello_card_id IS NOT NULL;
+
+-- Vacature MinHash: Signatures voor het herkennen van dubbele vacatures (scripts/dedup.py)
+CREATE TABLE vacature_minhash (
+    vacature_id     UUID PRIMARY KEY REFERENCES vacatures(vacature_id) ON DELETE CASCADE,
+    minhash_id      BIGSERIAL NOT NULL UNIQUE,
+    signature       BIGINT[] NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE vacature_minhash IS 'Afgeleide tabel: MinHash signature van titel + beschrijving per vacature';
+COMMENT ON COLUMN vacature_minhash.minhash_id IS 'Volgorde van indexeren: een vacature is alleen duplicaat van een eerder geïndexeerde';
+
+-- Vacature LSH: Band-buckets van de signatures; gelijke bucket = kandidaat-duplicaat
+CREATE TABLE vacature_lsh (
+    band            SMALLINT NOT NULL,
+    bucket          BIGINT NOT NULL,
+    vacature_id     UUID NOT NULL REFERENCES vacature_minhash(vacature_id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, vacature_id)
+);
+
+COMMENT ON TABLE vacature_lsh IS 'Afgeleide tabel: LSH index (band, bucket) -> vacature voor bijna-duplicaten';
+
+-- Duplicaat Bijlagen: URL's van duplicaten die nog aan de kaart van het origineel moeten
+-- (het origineel heeft misschien nog geen kaart); de processor leegt deze tabel
+CREATE TABLE duplicaat_bijlagen (
+    vacature_id     UUID PRIMARY KEY REFERENCES vacatures(vacature_id) ON DELETE CASCADE,
+    origineel_id    UUID NOT NULL REFERENCES vacatures(vacature_id) ON DELETE CASCADE,
+    pogingen        INTEGER NOT NULL DEFAULT 0,
+    fout            TEXT,                    -- gevuld = opgegeven (4xx of te vaak mislukt)
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE duplicaat_bijlagen IS 'Werkvoorraad: duplicaten waarvan de URL nog als bijlage aan de kaart van het origineel moet';
+
+CREATE INDEX idx_duplicaat_bijlagen_origineel ON duplicaat_bijlagen(origineel_id);
 
 -- Scrape Runs: Logging van scrape-runs per portal (legacy, wordt vervangen door job_runs)
 CREATE TABLE scrape_runs (
@@ -138,11 +264,13 @@ CREATE TABLE job_runs (
     items_processed INTEGER DEFAULT 0,
     items_success   INTEGER DEFAULT 0,
     items_failed    INTEGER DEFAULT 0,
-    error_message   TEXT
+    error_message   TEXT,
+    stappen         JSONB
 );
 
 COMMENT ON TABLE job_runs IS 'Fact-tabel: generieke logging voor alle job types';
 COMMENT ON COLUMN job_runs.job_type IS 'Type job: SCRAPE, PROCESS, WEBHOOK, FILTER';
+COMMENT ON COLUMN job_runs.stappen IS 'Tijd en aantal per stap (bijv. fetch, extract, db_write, trello) en tellers, zie common/metrics.py';
 
 CREATE INDEX idx_job_runs_type ON job_runs(job_type);
 CREATE INDEX idx_job_runs_start ON job_runs(start_tijd DESC);
@@ -152,7 +280,7 @@ CREATE INDEX idx_job_runs_status ON job_runs(status) WHERE status = 'RUNNING';
 -- HELPER VIEWS
 -- ============================================================================
 
--- View: Huidige status van elke vacature (laatste event)
+-- View: Huidige status van elke vacature (laatste event, uit de projectie vacature_status)
 CREATE VIEW v_vacature_status AS
 SELECT
     v.vacature_id,
@@ -166,20 +294,14 @@ SELECT
     v.tarief,
     v.deadline,
     v.eerste_gezien_op,
-    e.event_type AS laatste_event,
-    e.tijdstip AS laatste_event_tijdstip,
-    e.trello_card_id,
+    s.event_type AS laatste_event,
+    s.tijdstip AS laatste_event_tijdstip,
+    s.trello_card_id,
     tl.naam AS trello_lijst_naam
 FROM vacatures v
 JOIN portals p ON v.portal_id = p.portal_id
-LEFT JOIN LATERAL (
-    SELECT *
-    FROM vacature_events
-    WHERE vacature_id = v.vacature_id
-    ORDER BY tijdstip DESC
-    LIMIT 1
-) e ON TRUE
-LEFT JOIN trello_lijsten tl ON e.trello_lijst_id = tl.trello_lijst_id;
+LEFT JOIN vacature_status s ON s.vacature_id = v.vacature_id
+LEFT JOIN trello_lijsten tl ON s.trello_lijst_id = tl.trello_lijst_id;
 
 COMMENT ON VIEW v_vacature_status IS 'View: huidige status van elke vacature op basis van laatste event';
 
@@ -218,3 +340,254 @@ CREATE TRIGGER tr_keywords_updated_at
 CREATE TRIGGER tr_trello_lijsten_updated_at
     BEFORE UPDATE ON trello_lijsten
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER tr_scrape_state_updated_at
+    BEFORE UPDATE ON scrape_state
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================================================
+-- TRIGGERS: Werkvoorraad (vacature_pipeline) bijhouden
+-- ============================================================================
+
+-- Volgorde van de pipeline-stappen; een stap wordt nooit teruggezet
+CREATE OR REPLACE FUNCTION pipeline_rang(stage VARCHAR)
+RETURNS INTEGER AS $$
+    SELECT CASE stage
+        WHEN 'SCRAPED' THEN 1
+        WHEN 'FILTER_PASSED' THEN 2
+        WHEN 'FILTERED' THEN 3
+        WHEN 'DUPLICATE' THEN 3
+        WHEN 'ADDED_TO_TRELLO' THEN 3
+        ELSE 0
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Statement-level triggers: één bulk INSERT van de scraper = één upsert
+CREATE OR REPLACE FUNCTION pipeline_vacatures_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO vacature_pipeline (vacature_id, eerste_gezien_op)
+    SELECT vacature_id, eerste_gezien_op FROM nieuwe_vacatures
+    ON CONFLICT (vacature_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION pipeline_events_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE vacature_pipeline q
+    SET stage = n.event_type, stage_sinds = n.tijdstip
+    FROM (
+        SELECT DISTINCT ON (vacature_id) vacature_id, event_type, tijdstip
+        FROM nieuwe_events
+        WHERE event_type IN ('FILTER_PASSED', 'FILTERED', 'DUPLICATE', 'ADDED_TO_TRELLO')
+        ORDER BY vacature_id, pipeline_rang(event_type) DESC, tijdstip
+    ) n
+    WHERE q.vacature_id = n.vacature_id
+      AND pipeline_rang(n.event_type) > pipeline_rang(q.stage);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_vacatures_pipeline
+    AFTER INSERT ON vacatures
+    REFERENCING NEW TABLE AS nieuwe_vacatures
+    FOR EACH STATEMENT EXECUTE FUNCTION pipeline_vacatures_insert();
+
+CREATE TRIGGER tr_vacature_events_pipeline
+    AFTER INSERT ON vacature_events
+    REFERENCING NEW TABLE AS nieuwe_events
+    FOR EACH STATEMENT EXECUTE FUNCTION pipeline_events_insert();
+
+-- ============================================================================
+-- TRIGGER: Laatste event per vacature (vacature_status) bijhouden
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION status_events_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO vacature_status (vacature_id, event_id, event_type, tijdstip, trello_card_id, trello_lijst_id)
+    SELECT DISTINCT ON (vacature_id)
+           vacature_id, event_id, event_type, tijdstip, trello_card_id, trello_lijst_id
+    FROM nieuwe_events
+    ORDER BY vacature_id, tijdstip DESC, event_id DESC
+    ON CONFLICT (vacature_id) DO UPDATE SET
+        event_id = EXCLUDED.event_id,
+        event_type = EXCLUDED.event_type,
+        tijdstip = EXCLUDED.tijdstip,
+        trello_card_id = EXCLUDED.trello_card_id,
+        trello_lijst_id = EXCLUDED.trello_lijst_id
+    -- Nagekomen events met een ouder tijdstip (bijv. backfill) laten de status staan
+    WHERE (EXCLUDED.tijdstip, EXCLUDED.event_id) > (vacature_status.tijdstip, vacature_status.event_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_vacature_events_status
+    AFTER INSERT ON vacature_events
+    REFERENCING NEW TABLE AS nieuwe_events
+    FOR EACH STATEMENT EXECUTE FUNCTION status_events_insert();
+
+-- ============================================================================
+-- TRIGGER: Nieuwe Trello kaarten melden (NOTIFY trello_kaarten)
+-- De webhook listener houdt hiermee zijn card_id -> vacature_id cache bij.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION notify_trello_kaarten()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('trello_kaarten', json_build_object('card', trello_card_id, 'vacature', vacature_id)::text)
+    FROM nieuwe_events
+    WHERE event_type = 'ADDED_TO_TRELLO' AND trello_card_id IS NOT NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_vacature_events_notify_kaarten
+    AFTER INSERT ON vacature_events
+    REFERENCING NEW TABLE AS nieuwe_events
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_trello_kaarten();
+
+-- ============================================================================
+-- TRIGGER: Nieuwe gescrapete vacatures melden (NOTIFY nieuwe_vacatures)
+-- De scheduler (scripts/scheduler.py) start hiermee direct de processor.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION notify_nieuwe_vacatures()
+RETURNS TRIGGER AS $$
+DECLARE
+    aantal INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO aantal FROM nieuwe_events WHERE event_type = 'SCRAPED';
+    -- Eén melding per statement (een pagina van de scraper), verstuurd bij de COMMIT
+    IF aantal > 0 THEN
+        PERFORM pg_notify('nieuwe_vacatures', aantal::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_vacature_events_notify_vacatures
+    AFTER INSERT ON vacature_events
+    REFERENCING NEW TABLE AS nieuwe_events
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_nieuwe_vacatures();
+
+-- ============================================================================
+-- TRIGGER: Zoekvector van vacatures vullen
+-- De beschrijving staat in beschrijvingen (gaat bij de scraper eerst de database
+-- in); een GENERATED kolom kan niet in een andere tabel kijken.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION vacature_zoekvector(titel TEXT, beschrijving_hash BYTEA)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('dutch', COALESCE(titel, '')), 'A')
+        || setweight(to_tsvector('dutch', COALESCE(
+               (SELECT tekst FROM beschrijvingen WHERE hash = beschrijving_hash), ''
+           )), 'B');
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION zoekvector_vacatures()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.zoekvector := vacature_zoekvector(NEW.titel, NEW.beschrijving_hash);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_vacatures_zoekvector
+    BEFORE INSERT OR UPDATE OF titel, beschrijving_hash ON vacatures
+    FOR EACH ROW EXECUTE FUNCTION zoekvector_vacatures();
+
+-- ============================================================================
+-- REBUILD: Afgeleide tabellen opnieuw opbouwen uit de historie
+-- Gebruik: python scripts/rebuild_projections.py (of SELECT rebuild_...();)
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION rebuild_vacature_pipeline()
+RETURNS INTEGER AS $$
+DECLARE
+    aantal INTEGER;
+BEGIN
+    -- Geen nieuwe vacatures/events tijdens het opbouwen
+    LOCK TABLE vacatures, vacature_events IN SHARE MODE;
+    -- Geen DELETE vooraf: van gearchiveerde maanden zijn de events niet meer
+    -- aanwezig, dus een stap wordt alleen verder gezet, nooit teruggezet
+    INSERT INTO vacature_pipeline (vacature_id, stage, eerste_gezien_op, stage_sinds)
+    SELECT v.vacature_id,
+           COALESCE(e.event_type, 'SCRAPED'),
+           v.eerste_gezien_op,
+           COALESCE(e.tijdstip, v.eerste_gezien_op)
+    FROM vacatures v
+    LEFT JOIN LATERAL (
+        SELECT event_type, tijdstip
+        FROM vacature_events
+        WHERE vacature_id = v.vacature_id
+          AND event_type IN ('FILTER_PASSED', 'FILTERED', 'DUPLICATE', 'ADDED_TO_TRELLO')
+        ORDER BY pipeline_rang(event_type) DESC, tijdstip
+        LIMIT 1
+    ) e ON TRUE
+    ON CONFLICT (vacature_id) DO UPDATE SET
+        stage = EXCLUDED.stage, stage_sinds = EXCLUDED.stage_sinds
+    WHERE pipeline_rang(EXCLUDED.stage) > pipeline_rang(vacature_pipeline.stage);
+    GET DIAGNOSTICS aantal = ROW_COUNT;
+    RETURN aantal;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_vacature_status()
+RETURNS INTEGER AS $$
+DECLARE
+    aantal INTEGER;
+BEGIN
+    LOCK TABLE vacature_events IN SHARE MODE;
+    -- Vacatures waarvan alle events gearchiveerd zijn houden hun laatste status
+    INSERT INTO vacature_status (vacature_id, event_id, event_type, tijdstip, trello_card_id, trello_lijst_id)
+    SELECT DISTINCT ON (vacature_id)
+           vacature_id, event_id, event_type, tijdstip, trello_card_id, trello_lijst_id
+    FROM vacature_events
+    ORDER BY vacature_id, tijdstip DESC, event_id DESC
+    ON CONFLICT (vacature_id) DO UPDATE SET
+        event_id = EXCLUDED.event_id,
+        event_type = EXCLUDED.event_type,
+        tijdstip = EXCLUDED.tijdstip,
+        trello_card_id = EXCLUDED.trello_card_id,
+        trello_lijst_id = EXCLUDED.trello_lijst_id;
+    GET DIAGNOSTICS aantal = ROW_COUNT;
+    RETURN aantal;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- PARTITIES: Maandpartities van vacature_events aanmaken
+-- Gebruik: python scripts/event_partitions.py create (bijv. maandelijks via cron)
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION maak_event_partities(
+    maanden_vooruit INTEGER DEFAULT 3,
+    vanaf DATE DEFAULT CURRENT_DATE,
+    ouder TEXT DEFAULT 'vacature_events'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    maand DATE := date_trunc('month', vanaf);
+    tot DATE := date_trunc('month', CURRENT_DATE) + make_interval(months => maanden_vooruit + 1);
+    naam TEXT;
+    aantal INTEGER := 0;
+BEGIN
+    WHILE maand < tot LOOP
+        naam := 'vacature_events_' || to_char(maand, 'YYYY_MM');
+        IF to_regclass(naam) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                naam, ouder, maand, (maand + INTERVAL '1 month')::DATE
+            );
+            aantal := aantal + 1;
+        END IF;
+        maand := maand + INTERVAL '1 month';
+    END LOOP;
+    RETURN aantal;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT maak_event_partities();
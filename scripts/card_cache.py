@@ -0,0 +1,146 @@
+"""
+Kaart Cache
+Houdt in het geheugen bij welke Trello kaart bij welke vacature hoort, en de
+namen van de Trello lijsten, zodat de webhook listener voor bekende kaarten
+niets uit de database hoeft te lezen en alleen gewijzigde lijsten upsert.
+
+De cache wordt bij het opstarten gevuld met de recentste kaarten en daarna
+bijgehouden via LISTEN trello_kaarten: een trigger op vacature_events meldt
+elke nieuwe kaart (ADDED_TO_TRELLO), ook die van de processor.
+"""
+
+import json
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+import psycopg2
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+WEBHOOK_CACHE_SIZE = int(os.getenv('WEBHOOK_CACHE_SIZE', '10000'))
+
+NOTIFY_CHANNEL = 'trello_kaarten'
+# Onbekende kaart (bijv. een handmatig aangemaakte kaart op het bord)
+ONBEKEND = object()
+
+
+class LRUCache:
+    """Thread-safe dict met maximaal `maxsize` entries; de minst recent gebruikte valt eruit."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def discard_values(self, value):
+        """Verwijdert alle entries met deze waarde."""
+        with self.lock:
+            for key in [key for key, v in self.entries.items() if v is value]:
+                del self.entries[key]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CardCache:
+    """card_id -> vacature_id en trello_lijst_id -> naam, voor de webhook listener."""
+
+    def __init__(self, maxsize=WEBHOOK_CACHE_SIZE):
+        self.cards = LRUCache(maxsize)
+        self.lijsten = LRUCache(maxsize)
+
+    def prewarm(self, cur):
+        """Vult de cache met de recentst actieve kaarten en alle bekende lijsten."""
+        cur.execute("""
+            SELECT trello_card_id, vacature_id FROM vacature_status
+            WHERE trello_card_id IS NOT NULL
+            ORDER BY tijdstip DESC
+            LIMIT %s
+        """, (self.cards.maxsize,))
+        # Oudste eerst, zodat de recentste kaarten het langst in de LRU blijven
+        for card_id, vacature_id in reversed(cur.fetchall()):
+            self.cards.put(card_id, vacature_id)
+        cur.execute("SELECT trello_lijst_id, naam FROM trello_lijsten")
+        for lijst_id, naam in cur.fetchall():
+            self.lijsten.put(lijst_id, naam)
+        print(f"Kaart cache: {len(self.cards)} kaarten, {len(self.lijsten)} lijsten")
+
+    def lookup(self, cur, card_ids, find):
+        """
+        Geeft {card_id: vacature_id} voor de bekende kaarten. Alleen kaarten die
+        niet in de cache staan worden via `find(cur, card_ids)` opgezocht.
+        """
+        gevonden = {}
+        missers = set()
+        for card_id in card_ids:
+            vacature_id = self.cards.get(card_id)
+            if vacature_id is None:
+                missers.add(card_id)
+            elif vacature_id is not ONBEKEND:
+                gevonden[card_id] = vacature_id
+
+        if missers:
+            opgezocht = find(cur, missers)
+            for card_id in missers:
+                self.cards.put(card_id, opgezocht.get(card_id, ONBEKEND))
+            gevonden.update(opgezocht)
+        return gevonden
+
+    def changed_lists(self, lijsten):
+        """Filtert {lijst_id: naam} op lijsten die nieuw zijn of een andere naam hebben."""
+        return {
+            lijst_id: naam for lijst_id, naam in lijsten.items()
+            if self.lijsten.get(lijst_id) != naam
+        }
+
+    def remember_lists(self, lijsten):
+        """Na een geslaagde upsert: de lijstnamen onthouden."""
+        for lijst_id, naam in lijsten.items():
+            self.lijsten.put(lijst_id, naam)
+
+    def listen(self):
+        """
+        Luistert (in een eigen thread) naar nieuwe kaarten. Na een verbroken
+        verbinding worden de 'onbekend' entries gewist: er kan een melding gemist zijn.
+        """
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(DATABASE_URL)
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                self.cards.discard_values(ONBEKEND)
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        melding = json.loads(conn.notifies.pop(0).payload)
+                        self.cards.put(melding['card'], melding['vacature'])
+            except psycopg2.Error as e:
+                print(f"Kaart cache: LISTEN verbinding verbroken: {e}")
+                time.sleep(5)
+            finally:
+                if conn:
+                    conn.close()
+
+    def start_listener(self):
+        threading.Thread(target=self.listen, name='card-cache-listen', daemon=True).start()
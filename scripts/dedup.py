@@ -0,0 +1,231 @@
+"""
+Dubbele vacatures herkennen
+Dezelfde opdracht staat vaak op meerdere portals onder een andere URL. Deze stap
+vergelijkt titel + beschrijving via MinHash en een LSH index in PostgreSQL
+(vacature_minhash, vacature_lsh). Een nieuwe vacature kost een vast aantal
+opzoekingen (één per band), hoe groot het archief ook is.
+
+Een vacature die (bijna) gelijk is aan een eerder gezien exemplaar krijgt een
+DUPLICATE event met duplicaat_van; de processor maakt er geen Trello kaart voor.
+
+Gebruik:
+  python scripts/dedup.py <vacature_id>    - Toon de bijna-duplicaten van een vacature
+"""
+
+import hashlib
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+import psycopg2
+from psycopg2.extras import execute_values
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+# Geschatte Jaccard-overeenkomst vanaf waar twee vacatures als dubbel gelden
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.8'))
+# Alleen vergelijken met vacatures van de laatste zoveel dagen (herplaatsingen daarna zijn nieuw)
+DEDUP_WINDOW_DAYS = int(os.getenv('DEDUP_WINDOW_DAYS', '60'))
+# Alleen vacatures die een Trello kaart hebben of nog krijgen kunnen het origineel zijn;
+# anders wacht de bijlage in duplicaat_bijlagen op een kaart die nooit komt
+ORIGINEEL_STAGES = ('FILTER_PASSED', 'ADDED_TO_TRELLO')
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Te korte teksten (alleen een titel) geven te veel valse duplicaten
+MIN_SHINGLES = 10
+
+# 2^61 - 1: priem voor de permutaties en tegelijk masker voor 61-bit shingle hashes
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Vaste seed: signatures moeten tussen runs vergelijkbaar blijven
+_random = random.Random(20260130)
+PERMUTATIONS = [
+    (_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+WORD = re.compile(r'\w+')
+
+
+def shingles(vacature):
+    """Woord-trigrammen uit titel en beschrijving, als 61-bit hashes."""
+    woorden = WORD.findall(f"{vacature.get('titel') or ''} {vacature.get('beschrijving') or ''}".lower())
+    grams = {' '.join(woorden[i:i + SHINGLE_SIZE]) for i in range(len(woorden) - SHINGLE_SIZE + 1)}
+    return [
+        int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big') & MERSENNE_PRIME
+        for gram in grams
+    ]
+
+
+def minhash(hashes):
+    """MinHash signature: per permutatie de kleinste (a*x + b) mod p."""
+    return [
+        min((a * x + b) % MERSENNE_PRIME for x in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def lsh_buckets(signature):
+    """Eén bucket per band: een 64-bit hash over ROWS_PER_BAND waarden van de signature."""
+    buckets = []
+    for band in range(BANDS):
+        rij = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr(rij).encode('ascii'), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+
+def similarity(sig_a, sig_b):
+    """Geschatte Jaccard-overeenkomst: aandeel gelijke posities in de signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def index_vacature(cur, vacature_id, signature):
+    """
+    Zet een vacature in de LSH index (als dat nog niet gebeurd was).
+    Geeft het minhash_id terug; alleen vacatures met een lager id zijn 'eerder'.
+    """
+    cur.execute("""
+        INSERT INTO vacature_minhash (vacature_id, signature)
+        VALUES (%s, %s)
+        ON CONFLICT (vacature_id) DO UPDATE SET vacature_id = EXCLUDED.vacature_id
+        RETURNING minhash_id, signature
+    """, (str(vacature_id), signature))
+    minhash_id, opgeslagen = cur.fetchone()
+    execute_values(
+        cur,
+        """
+        INSERT INTO vacature_lsh (band, bucket, vacature_id) VALUES %s
+        ON CONFLICT DO NOTHING
+        """,
+        [(band, bucket, str(vacature_id)) for band, bucket in lsh_buckets(opgeslagen)],
+        page_size=BANDS
+    )
+    return minhash_id, opgeslagen
+
+
+def find_candidates(cur, signature):
+    """
+    Vacatures die in minstens één band dezelfde bucket hebben.
+    Geeft rijen (vacature_id, minhash_id, signature, titel, portal_id, eerste_gezien_op, stage).
+    """
+    buckets = lsh_buckets(signature)
+    cur.execute("""
+        SELECT m.vacature_id, m.minhash_id, m.signature, v.titel, v.portal_id,
+               v.eerste_gezien_op, q.stage
+        FROM (
+            SELECT DISTINCT vacature_id FROM vacature_lsh
+            WHERE (band, bucket) IN (SELECT * FROM unnest(%s::smallint[], %s::bigint[]))
+        ) l
+        JOIN vacature_minhash m ON m.vacature_id = l.vacature_id
+        JOIN vacatures v ON v.vacature_id = l.vacature_id
+        LEFT JOIN vacature_pipeline q ON q.vacature_id = l.vacature_id
+        ORDER BY m.minhash_id
+    """, ([band for band, _ in buckets], [bucket for _, bucket in buckets]))
+    return cur.fetchall()
+
+
+def find_original(cur, vacature_id, minhash_id, signature):
+    """
+    Zoekt het eerst geïndexeerde exemplaar met (straks) een kaart dat genoeg op
+    deze vacature lijkt. Geeft (vacature_id, overeenkomst) of None terug.
+    """
+    sinds = datetime.now(timezone.utc) - timedelta(days=DEDUP_WINDOW_DAYS)
+    for kandidaat_id, kandidaat_minhash_id, kandidaat_sig, _, _, gezien_op, stage in find_candidates(cur, signature):
+        # Alleen eerder geïndexeerde vacatures: zo wordt nooit het origineel als duplicaat gemarkeerd
+        if kandidaat_minhash_id >= minhash_id or stage not in ORIGINEEL_STAGES or gezien_op < sinds:
+            continue
+        score = similarity(signature, kandidaat_sig)
+        if score >= DEDUP_THRESHOLD:
+            return kandidaat_id, score
+    return None
+
+
+def dedup_vacatures(cur, vacatures, bron='processor:dedup'):
+    """
+    Indexeert de vacatures en legt voor bijna-duplicaten een DUPLICATE event vast
+    (één bulk INSERT), plus een rij in duplicaat_bijlagen zodat hun URL aan de
+    kaart van het origineel gehangen wordt. Vacatures in dezelfde batch worden op
+    volgorde vergeleken.
+    Geeft (uniek, duplicaten) terug; duplicaten is een lijst (vacature, origineel_id, score).
+    """
+    uniek = []
+    duplicaten = []
+    for vac in vacatures:
+        hashes = shingles(vac)
+        if len(hashes) < MIN_SHINGLES:
+            uniek.append(vac)
+            continue
+
+        minhash_id, signature = index_vacature(cur, vac['vacature_id'], minhash(hashes))
+        origineel = find_original(cur, vac['vacature_id'], minhash_id, signature)
+        if origineel:
+            duplicaten.append((vac, *origineel))
+        else:
+            uniek.append(vac)
+
+    if duplicaten:
+        execute_values(
+            cur,
+            """
+            INSERT INTO vacature_events (vacature_id, event_type, bron, duplicaat_van)
+            VALUES %s
+            """,
+            [(str(vac['vacature_id']), bron, str(origineel_id)) for vac, origineel_id, _ in duplicaten],
+            template="(%s, 'DUPLICATE', %s, %s)",
+            page_size=len(duplicaten)
+        )
+        execute_values(
+            cur,
+            """
+            INSERT INTO duplicaat_bijlagen (vacature_id, origineel_id) VALUES %s
+            ON CONFLICT (vacature_id) DO NOTHING
+            """,
+            [(str(vac['vacature_id']), str(origineel_id)) for vac, origineel_id, _ in duplicaten],
+            page_size=len(duplicaten)
+        )
+    return uniek, duplicaten
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("  python dedup.py <vacature_id>    - Toon de bijna-duplicaten van een vacature")
+        sys.exit(1)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT v.vacature_id, v.titel, b.tekst
+            FROM vacatures v
+            LEFT JOIN beschrijvingen b ON b.hash = v.beschrijving_hash
+            WHERE v.vacature_id = %s
+        """, (sys.argv[1],))
+        row = cur.fetchone()
+        if not row:
+            print("Vacature niet gevonden")
+            sys.exit(1)
+
+        signature = minhash(shingles({'titel': row[1], 'beschrijving': row[2]}))
+        kandidaten = sorted(
+            (
+                (similarity(signature, sig), titel, portal_id, vacature_id)
+                for vacature_id, _, sig, titel, portal_id, _, _ in find_candidates(cur, signature)
+                if str(vacature_id) != sys.argv[1]
+            ),
+            reverse=True
+        )
+        if not kandidaten:
+            print("Geen bijna-duplicaten gevonden")
+        for score, titel, portal_id, vacature_id in kandidaten:
+            teken = '=' if score >= DEDUP_THRESHOLD else '~'
+            print(f"{teken} {score:.2f} [{portal_id}] {titel} ({vacature_id})")
+    finally:
+        conn.close()
@@ -0,0 +1,296 @@
+"""
+Partities van vacature_events
+vacature_events is per maand gepartitioneerd op tijdstip (zie schema.sql). Dit
+script maakt de partities voor de komende maanden aan, archiveert oude maanden
+naar gecomprimeerde CSV bestanden en zet een bestaande, nog niet gepartitioneerde
+tabel online om.
+
+De werkvoorraad (vacature_pipeline), de huidige status (vacature_status) en het
+opzoeken van kaarten lezen alleen de projecties, dus archiveren maakt voor de
+processor en de webhook listener niets uit.
+
+Gebruik:
+  python scripts/event_partitions.py create [maanden]           - Partities voor de komende maanden (standaard 3)
+  python scripts/event_partitions.py archive <maanden> [map]    - Archiveer maanden ouder dan <maanden>
+  python scripts/event_partitions.py migrate                    - Zet een bestaande tabel om (PostgreSQL 11+)
+"""
+
+import csv
+import gzip
+import os
+import re
+import sys
+from datetime import date
+from pathlib import Path
+from dotenv import load_dotenv
+import psycopg2
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+EVENT_ARCHIVE_DIR = os.getenv('EVENT_ARCHIVE_DIR', 'archief')
+# Migratie: zoveel events per transactie kopiëren
+MIGRATE_BATCH_SIZE = 50000
+
+# Indexes van vacature_events (naam -> definitie), gelijk aan schema.sql
+EVENT_INDEXES = {
+    'idx_events_vacature_tijdstip': '(vacature_id, tijdstip DESC, event_id DESC)',
+    'idx_events_tijdstip': '(tijdstip DESC)',
+    'idx_events_type': '(event_type)',
+    'idx_events_trello_card': '(trello_card_id) WHERE trello_card_id IS NOT NULL',
+}
+# Triggers op vacature_events (naam -> functie), gelijk aan schema.sql
+EVENT_TRIGGERS = {
+    'tr_vacature_events_pipeline': 'pipeline_events_insert',
+    'tr_vacature_events_status': 'status_events_insert',
+    'tr_vacature_events_notify_kaarten': 'notify_trello_kaarten',
+    'tr_vacature_events_notify_vacatures': 'notify_nieuwe_vacatures',
+}
+# Functies die de gepartitioneerde tabel nodig heeft; een bestaande database heeft
+# ze nog niet, of in een oudere versie (rebuild_* zonder upsert)
+MIGRATE_FUNCTIONS = (
+    'pipeline_rang',
+    'maak_event_partities',
+    'rebuild_vacature_pipeline',
+    'rebuild_vacature_status',
+    *EVENT_TRIGGERS.values(),
+)
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'schema.sql'
+SCHEMA_FUNCTION = re.compile(r"^CREATE OR REPLACE FUNCTION (\w+)\(.*?^\$\$ LANGUAGE [^;]*;", re.S | re.M)
+
+
+def create_partitions(cur, maanden=3):
+    """Maakt de ontbrekende maandpartities tot en met `maanden` vooruit. Geeft het aantal nieuwe."""
+    cur.execute("SELECT maak_event_partities(%s)", (maanden,))
+    return cur.fetchone()[0]
+
+
+def schema_functions(namen):
+    """De CREATE OR REPLACE FUNCTION statements uit schema.sql voor `namen`, in die volgorde."""
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        functies = {m.group(1): m.group(0) for m in SCHEMA_FUNCTION.finditer(f.read())}
+    ontbrekend = [naam for naam in namen if naam not in functies]
+    if ontbrekend:
+        raise RuntimeError(f"Niet gevonden in {SCHEMA_PATH}: {', '.join(ontbrekend)}")
+    return [functies[naam] for naam in namen]
+
+
+def old_partitions(cur, maanden_bewaren):
+    """
+    Maandpartities die helemaal voor de bewaargrens liggen, oudste eerst. Ook al
+    losgekoppelde maanden waarvan het archiveren eerder is afgebroken.
+    Geeft een lijst (naam, van, tot, gekoppeld).
+    """
+    vandaag = date.today()
+    maand = vandaag.year * 12 + vandaag.month - 1 - maanden_bewaren
+    grens = date(maand // 12, maand % 12 + 1, 1)
+
+    cur.execute("""
+        SELECT c.relname, i.inhparent IS NOT NULL
+        FROM pg_class c
+        LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+        WHERE c.relkind = 'r'
+          AND c.relname ~ '^vacature_events_[0-9]{4}_[0-9]{2}$'
+          AND (i.inhparent IS NULL OR i.inhparent = 'vacature_events'::regclass)
+        ORDER BY c.relname
+    """)
+    partities = []
+    for naam, gekoppeld in cur.fetchall():
+        jaar, maand = int(naam[-7:-3]), int(naam[-2:])
+        van = date(jaar, maand, 1)
+        tot = date(jaar + maand // 12, maand % 12 + 1, 1)
+        if tot <= grens:
+            partities.append((naam, van, tot, gekoppeld))
+    return partities
+
+
+def archive(maanden_bewaren, doelmap=EVENT_ARCHIVE_DIR):
+    """
+    Koppelt maandpartities ouder dan `maanden_bewaren` los, schrijft ze naar
+    <doelmap>/<partitie>.csv.gz en verwijdert ze. Het loskoppelen is een eigen,
+    korte transactie (DETACH legt vacature_events even helemaal vast); de export
+    leest daarna de losse tabel, zodat de schrijvers niet op het archief wachten.
+    """
+    os.makedirs(doelmap, exist_ok=True)
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        partities = old_partitions(cur, maanden_bewaren)
+        if not partities:
+            print("Geen partities om te archiveren")
+            return
+
+        for naam, van, tot, gekoppeld in partities:
+            pad = os.path.join(doelmap, f"{naam}.csv.gz")
+            print(f"{naam} ({van} t/m {tot}) archiveren naar {pad}...")
+            if gekoppeld:
+                cur.execute(f'ALTER TABLE vacature_events DETACH PARTITION "{naam}"')
+                conn.commit()
+            cur.execute(f'SELECT COUNT(*) FROM "{naam}"')
+            aantal = cur.fetchone()[0]
+
+            with gzip.open(pad, 'wt', encoding='utf-8', newline='') as f:
+                cur.copy_expert(f'COPY "{naam}" TO STDOUT WITH CSV HEADER', f)
+            with gzip.open(pad, 'rt', encoding='utf-8', newline='') as f:
+                # Controle voor het verwijderen; de kopregel telt niet mee
+                geschreven = sum(1 for _ in csv.reader(f)) - 1
+            if geschreven < aantal:
+                raise RuntimeError(f"{pad}: {geschreven} van {aantal} events geschreven")
+
+            cur.execute(f'DROP TABLE "{naam}"')
+            conn.commit()
+            print(f"✓ {naam}: {aantal} events gearchiveerd")
+    except (psycopg2.Error, OSError, RuntimeError) as e:
+        print(f"Fout bij archiveren: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def migrate():
+    """
+    Zet een bestaande, niet-gepartitioneerde vacature_events tabel om zonder de
+    schrijvers lang stil te leggen:
+      1. nieuwe gepartitioneerde tabel ernaast, met een trigger die nieuwe events meeschrijft
+      2. bestaande events in batches kopiëren
+      3. in één korte transactie de tabellen omwisselen en de triggers verhangen
+    De oude tabel blijft als vacature_events_oud staan tot hij handmatig verwijderd wordt.
+    Functies en indexes die bij de partities horen komen eerst uit schema.sql.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = 'vacature_events'::regclass")
+        if cur.fetchone()[0] == 'p':
+            print("vacature_events is al gepartitioneerd")
+            return
+
+        print("Functies en indexes uit schema.sql bijwerken...")
+        for functie in schema_functions(MIGRATE_FUNCTIONS):
+            cur.execute(functie)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_status_trello_card
+                ON vacature_status(trello_card_id) WHERE trello_card_id IS NOT NULL
+        """)
+        conn.commit()
+
+        print("Gepartitioneerde tabel aanmaken...")
+        cur.execute("""
+            CREATE TABLE vacature_events_nieuw
+                (LIKE vacature_events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+                PARTITION BY RANGE (tijdstip);
+            ALTER TABLE vacature_events_nieuw
+                ADD CONSTRAINT vacature_events_nieuw_pkey PRIMARY KEY (event_id, tijdstip),
+                ADD FOREIGN KEY (vacature_id) REFERENCES vacatures(vacature_id) ON DELETE RESTRICT,
+                ADD FOREIGN KEY (trello_lijst_id) REFERENCES trello_lijsten(trello_lijst_id) ON DELETE RESTRICT,
+                ADD FOREIGN KEY (duplicaat_van) REFERENCES vacatures(vacature_id) ON DELETE RESTRICT;
+            CREATE UNIQUE INDEX uq_events_trello_action_nieuw
+                ON vacature_events_nieuw(trello_action_id, tijdstip);
+            CREATE TABLE vacature_events_default PARTITION OF vacature_events_nieuw DEFAULT;
+        """)
+        for index, definitie in EVENT_INDEXES.items():
+            cur.execute(f"CREATE INDEX {index}_nieuw ON vacature_events_nieuw{definitie}")
+        cur.execute("SELECT COALESCE(MIN(tijdstip)::date, CURRENT_DATE) FROM vacature_events")
+        cur.execute("SELECT maak_event_partities(3, %s, 'vacature_events_nieuw')", (cur.fetchone()[0],))
+        print(f"✓ {cur.fetchone()[0]} maandpartities aangemaakt")
+
+        # Vanaf hier komen nieuwe events in beide tabellen. CREATE TRIGGER wacht
+        # op lopende schrijvers, dus na deze commit mist de kopie niets meer.
+        cur.execute("""
+            CREATE FUNCTION vacature_events_meeschrijven() RETURNS TRIGGER AS $$
+            BEGIN
+                INSERT INTO vacature_events_nieuw SELECT NEW.* ON CONFLICT DO NOTHING;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            CREATE TRIGGER tr_vacature_events_meeschrijven
+                AFTER INSERT ON vacature_events
+                FOR EACH ROW EXECUTE FUNCTION vacature_events_meeschrijven();
+        """)
+        conn.commit()
+
+        cur.execute("SELECT COALESCE(MAX(event_id), 0) FROM vacature_events")
+        max_id = cur.fetchone()[0]
+        print(f"Events kopiëren (t/m event_id {max_id})...")
+        vanaf = 0
+        while vanaf < max_id:
+            cur.execute("""
+                INSERT INTO vacature_events_nieuw
+                SELECT * FROM vacature_events WHERE event_id > %s AND event_id <= %s
+                ON CONFLICT DO NOTHING
+            """, (vanaf, vanaf + MIGRATE_BATCH_SIZE))
+            conn.commit()
+            vanaf += MIGRATE_BATCH_SIZE
+            print(f"  t/m event_id {min(vanaf, max_id)}")
+
+        print("Tabellen omwisselen...")
+        cur.execute("LOCK TABLE vacature_events IN ACCESS EXCLUSIVE MODE")
+        cur.execute("""
+            DROP TRIGGER tr_vacature_events_meeschrijven ON vacature_events;
+            DROP FUNCTION vacature_events_meeschrijven();
+        """)
+        for trigger in EVENT_TRIGGERS:
+            cur.execute(f"DROP TRIGGER IF EXISTS {trigger} ON vacature_events")
+
+        cur.execute("""
+            ALTER TABLE vacature_events RENAME TO vacature_events_oud;
+            ALTER TABLE vacature_events_nieuw RENAME TO vacature_events;
+            ALTER INDEX vacature_events_pkey RENAME TO vacature_events_oud_pkey;
+            ALTER INDEX vacature_events_nieuw_pkey RENAME TO vacature_events_pkey;
+            ALTER INDEX IF EXISTS uq_events_trello_action RENAME TO uq_events_trello_action_oud;
+            ALTER INDEX uq_events_trello_action_nieuw RENAME TO uq_events_trello_action;
+            ALTER SEQUENCE vacature_events_event_id_seq OWNED BY vacature_events.event_id;
+        """)
+        for index in EVENT_INDEXES:
+            cur.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_oud")
+            cur.execute(f"ALTER INDEX {index}_nieuw RENAME TO {index}")
+        for trigger, functie in EVENT_TRIGGERS.items():
+            cur.execute(f"""
+                CREATE TRIGGER {trigger}
+                    AFTER INSERT ON vacature_events
+                    REFERENCING NEW TABLE AS nieuwe_events
+                    FOR EACH STATEMENT EXECUTE FUNCTION {functie}()
+            """)
+        conn.commit()
+        print("✓ vacature_events is nu gepartitioneerd")
+        print("  Controleer de aantallen en verwijder daarna: DROP TABLE vacature_events_oud;")
+    except psycopg2.Error as e:
+        print(f"Database fout: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def print_usage():
+    print("Usage:")
+    print("  python event_partitions.py create [maanden]           - Partities voor de komende maanden (standaard 3)")
+    print("  python event_partitions.py archive <maanden> [map]    - Archiveer maanden ouder dan <maanden>")
+    print("  python event_partitions.py migrate                    - Zet een bestaande tabel om (PostgreSQL 11+)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print_usage()
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == "create":
+        maanden = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            aantal = create_partitions(conn.cursor(), maanden)
+            conn.commit()
+            print(f"✓ {aantal} nieuwe partities aangemaakt")
+        finally:
+            conn.close()
+    elif command == "archive" and len(sys.argv) > 2:
+        archive(int(sys.argv[2]), *sys.argv[3:4])
+    elif command == "migrate":
+        migrate()
+    else:
+        print_usage()
+        sys.exit(1)
@@ -0,0 +1,167 @@
+"""
+Keyword Filter
+De FILTER stap van de processor: vacatures met een ongewenst keyword (titel of
+beschrijving) of een ongewenste locatie krijgen een FILTERED event met het
+keyword, de rest een FILTER_PASSED event.
+
+Alle actieve keywords uit v_actieve_keywords worden samengevoegd tot één regex
+in trie-vorm (gedeelde voorvoegsels één keer), zodat een vacature in één
+doorgang per veld gescand wordt, ongeacht het aantal keywords. De gecompileerde
+matcher wordt hergebruikt zolang de keywords tabel niet gewijzigd is.
+
+Gebruik:
+  python scripts/keyword_filter.py "<tekst>"    - Toon welk keyword in de tekst matcht
+"""
+
+import os
+import re
+import sys
+from dotenv import load_dotenv
+import psycopg2
+from psycopg2.extras import execute_values
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+
+def normalize(text):
+    """Kleine letters en enkele spaties, zoals keywords vergeleken worden."""
+    return ' '.join(text.lower().split())
+
+
+def trie_pattern(words):
+    """
+    Bouwt een regex die precies de gegeven woorden matcht, als trie:
+    ['java', 'javascript'] -> 'java(?:script)?'. Spaties matchen elke witruimte.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        eind = '' in node
+        takken = [
+            (r'\s+' if char == ' ' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not takken:
+            return ''
+        if len(takken) == 1 and not eind:
+            return takken[0]
+        pattern = '(?:' + '|'.join(takken) + ')'
+        return pattern + '?' if eind else pattern
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Gecompileerde matcher voor UNWANTED_KEYWORD en UNWANTED_LOCATIE regels."""
+
+    def __init__(self, keywords):
+        """`keywords` is een lijst (keyword, type) uit v_actieve_keywords."""
+        self.keywords = {}
+        self.locaties = {}
+        for keyword, soort in keywords:
+            doel = self.locaties if soort == 'UNWANTED_LOCATIE' else self.keywords
+            # Bij dubbele keywords wint de eerste schrijfwijze
+            doel.setdefault(normalize(keyword), keyword)
+        self.keyword_regex = self.compile(self.keywords)
+        self.locatie_regex = self.compile(self.locaties)
+
+    @staticmethod
+    def compile(woorden):
+        woorden = [woord for woord in woorden if woord]
+        if not woorden:
+            return None
+        # Alleen hele woorden: "java" matcht niet in "javascript"
+        return re.compile(r'(?<!\w)' + trie_pattern(woorden) + r'(?!\w)')
+
+    @staticmethod
+    def search(regex, woorden, *teksten):
+        if not regex:
+            return None
+        for tekst in teksten:
+            if tekst:
+                match = regex.search(tekst.lower())
+                if match:
+                    return woorden[normalize(match.group())]
+        return None
+
+    def match(self, vacature):
+        """Geeft het keyword terug waarop de vacature gefilterd wordt, of None."""
+        return (
+            self.search(self.keyword_regex, self.keywords,
+                        vacature.get('titel'), vacature.get('beschrijving'))
+            or self.search(self.locatie_regex, self.locaties, vacature.get('locatie'))
+        )
+
+
+_matcher = None
+_matcher_key = None
+
+
+def get_matcher(cur):
+    """
+    Geeft de matcher voor de huidige keywords. Alleen opnieuw compileren als de
+    keywords tabel gewijzigd is (updated_at, aantal) of de datum veranderd is
+    (uitzondering_tot is afhankelijk van CURRENT_DATE).
+    """
+    global _matcher, _matcher_key
+    cur.execute("SELECT MAX(updated_at), COUNT(*), CURRENT_DATE FROM keywords")
+    key = cur.fetchone()
+    if _matcher is None or key != _matcher_key:
+        cur.execute("SELECT keyword, type FROM v_actieve_keywords")
+        _matcher = KeywordMatcher(cur.fetchall())
+        _matcher_key = key
+        print(f"Filter: {len(_matcher.keywords)} keywords, {len(_matcher.locaties)} locaties geladen")
+    return _matcher
+
+
+def filter_vacatures(cur, vacatures, bron='processor:filter'):
+    """
+    Filtert vacatures en legt per vacature een FILTERED of FILTER_PASSED event
+    vast (één bulk INSERT). Geeft (doorgelaten, gefilterd) terug; gefilterd is
+    een lijst (vacature, keyword).
+    """
+    matcher = get_matcher(cur)
+    doorgelaten = []
+    gefilterd = []
+    for vac in vacatures:
+        keyword = matcher.match(vac)
+        if keyword:
+            gefilterd.append((vac, keyword))
+        else:
+            doorgelaten.append(vac)
+
+    rows = [(str(vac['vacature_id']), 'FILTERED', bron, keyword[:200]) for vac, keyword in gefilterd]
+    rows += [(str(vac['vacature_id']), 'FILTER_PASSED', bron, None) for vac in doorgelaten]
+    if rows:
+        execute_values(
+            cur,
+            """
+            INSERT INTO vacature_events (vacature_id, event_type, bron, filter_keyword)
+            VALUES %s
+            """,
+            rows,
+            page_size=len(rows)
+        )
+    return doorgelaten, gefilterd
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print('  python keyword_filter.py "<tekst>"    - Toon welk keyword in de tekst matcht')
+        sys.exit(1)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        tekst = ' '.join(sys.argv[1:])
+        keyword = get_matcher(conn.cursor()).match({'titel': tekst, 'locatie': tekst})
+        print(f"✗ Gefilterd op: {keyword}" if keyword else "✓ Geen keyword gevonden")
+    finally:
+        conn.close()
@@ -1,15 +1,27 @@
 """
 Vacature Processor
-Verwerkt nieuwe vacatures: maakt Trello kaarten aan voor vacatures met FILTER_PASSED event.
-Voor nu: maakt automatisch FILTER_PASSED aan (keyword filtering komt later).
+Verwerkt nieuwe vacatures: filtert ze op ongewenste keywords en locaties
+(FILTERED of FILTER_PASSED), herkent dubbele vacatures van andere portals
+(DUPLICATE) en maakt Trello kaarten aan voor de overige vacatures.
 """
 
 import os
-from datetime import datetime, timedelta
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
 import requests
 from dotenv import load_dotenv
 import psycopg2
-import holidays
+from psycopg2.extras import Json, execute_values
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.http_client import get_client  # noqa: E402
+from common.metrics import Metrics  # noqa: E402
+from common.rate_limit import TokenBucket  # noqa: E402
+from common.workdays import add_workdays  # noqa: E402
+from keyword_filter import filter_vacatures  # noqa: E402
+from dedup import dedup_vacatures  # noqa: E402
 
 load_dotenv()
 
@@ -17,64 +29,155 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 TRELLO_API_KEY = os.getenv('TRELLO_API_KEY')
 TRELLO_TOKEN = os.getenv('TRELLO_TOKEN')
 TRELLO_LIST_ID = os.getenv('TRELLO_LIST_ID')
+TRELLO_BOARD_ID = os.getenv('TRELLO_BOARD_ID')
 
 TRELLO_API_URL = "https://api.trello.com/1"
+TRELLO_CONCURRENCY = int(os.getenv('TRELLO_CONCURRENCY', '8'))
+TRELLO_MAX_RETRIES = 5
+PROCESS_BATCH_SIZE = int(os.getenv('PROCESS_BATCH_SIZE', '25'))
+# Na zoveel mislukte pogingen (of direct bij een 4xx) blijft een bijlage met de fout staan
+DUPLICATE_ATTACH_MAX_ATTEMPTS = int(os.getenv('DUPLICATE_ATTACH_MAX_ATTEMPTS', '5'))
+
+# Trello limieten: 300 requests per 10 sec per API key, 100 per 10 sec per token
+trello_key_bucket = TokenBucket(300, 10)
+trello_token_bucket = TokenBucket(100, 10)
+
+# Tijd per stap van de huidige run, komt in job_runs.stappen
+metrics = Metrics()
 
 
-def get_unprocessed_vacatures(cur):
+def get_unprocessed_vacatures(cur, limit=None, after=None):
     """
-    Haalt vacatures op die FILTER_PASSED hebben maar nog geen ADDED_TO_TRELLO.
-    Voor nu: ook vacatures die alleen SCRAPED hebben (auto FILTER_PASSED).
+    Claimt vacatures die nog niet gefilterd zijn (SCRAPED) of FILTER_PASSED
+    hebben maar nog geen ADDED_TO_TRELLO.
+    Leest de werkvoorraad uit vacature_pipeline (bijgehouden door triggers) in
+    plaats van de hele event-historie te scannen. Keyset paginering: `after` is
+    (eerste_gezien_op, vacature_id) van de laatst geclaimde vacature.
+    De rijen blijven gelockt tot de transactie van `cur` eindigt; rijen die een
+    andere processor al geclaimd heeft worden overgeslagen (SKIP LOCKED).
+    NO KEY UPDATE, zodat events (FK naar vacatures) nog wel ingevoegd kunnen worden.
+    De beschrijving zit er niet bij: die laadt load_beschrijvingen() pas als een stap hem nodig heeft.
+    Geeft (vacatures, laatste) terug: laatste is de keyset van de laatst geclaimde
+    rij (ook als die intussen al afgerond was), of None als er niets meer te claimen is.
     """
-    cur.execute("""
+    keyset = ""
+    params = []
+    if after:
+        keyset = "AND (q.eerste_gezien_op, q.vacature_id) < (%s, %s::uuid)"
+        params = [after[0], str(after[1])]
+    
+    cur.execute(f"""
         SELECT v.vacature_id, v.url, v.titel, v.organisatie, v.locatie, 
-               v.uren_per_week, v.tarief, v.deadline, v.beschrijving,
+               v.uren_per_week, v.tarief, v.deadline,
                p.naam as portal_naam,
-               EXISTS (
-                   SELECT 1 FROM vacature_events e 
-                   WHERE e.vacature_id = v.vacature_id 
-                   AND e.event_type = 'FILTER_PASSED'
-               ) as has_filter_passed
-        FROM vacatures v
+               q.eerste_gezien_op,
+               q.stage = 'FILTER_PASSED' as has_filter_passed
+        FROM vacature_pipeline q
+        JOIN vacatures v ON v.vacature_id = q.vacature_id
         JOIN portals p ON v.portal_id = p.portal_id
-        WHERE NOT EXISTS (
-            SELECT 1 FROM vacature_events e 
-            WHERE e.vacature_id = v.vacature_id 
-            AND e.event_type IN ('ADDED_TO_TRELLO', 'FILTERED')
-        )
-        ORDER BY v.eerste_gezien_op DESC
-    """)
-    
+        WHERE q.stage IN ('SCRAPED', 'FILTER_PASSED')
+        {keyset}
+        ORDER BY q.eerste_gezien_op DESC, q.vacature_id DESC
+        LIMIT %s
+        FOR NO KEY UPDATE OF v SKIP LOCKED
+    """, params + [limit])
+    rows = cur.fetchall()
     columns = [desc[0] for desc in cur.description]
-    return [dict(zip(columns, row)) for row in cur.fetchall()]
+    
+    vacatures = [dict(zip(columns, row)) for row in rows]
+    if not vacatures:
+        return vacatures, None
+    laatste = (vacatures[-1]['eerste_gezien_op'], vacatures[-1]['vacature_id'])
+    
+    # Opnieuw controleren na het claimen: een andere processor kan deze vacature
+    # net hebben afgerond en zijn lock hebben vrijgegeven.
+    cur.execute("""
+        SELECT vacature_id FROM vacature_pipeline
+        WHERE vacature_id = ANY(%s::uuid[])
+        AND stage IN ('ADDED_TO_TRELLO', 'FILTERED', 'DUPLICATE')
+    """, ([str(vac['vacature_id']) for vac in vacatures],))
+    done = {str(row[0]) for row in cur.fetchall()}
+    return [vac for vac in vacatures if str(vac['vacature_id']) not in done], laatste
+
+
+def load_beschrijvingen(cur, vacatures):
+    """
+    Vult vac['beschrijving'] aan voor vacatures die hem nog niet hebben, met één
+    query voor de hele lijst. Vacatures zonder beschrijving krijgen None.
+    """
+    ontbrekend = [vac for vac in vacatures if 'beschrijving' not in vac]
+    if not ontbrekend:
+        return
+    cur.execute("""
+        SELECT v.vacature_id, b.tekst
+        FROM vacatures v
+        JOIN beschrijvingen b ON b.hash = v.beschrijving_hash
+        WHERE v.vacature_id = ANY(%s::uuid[])
+    """, ([str(vac['vacature_id']) for vac in ontbrekend],))
+    teksten = {str(vacature_id): tekst for vacature_id, tekst in cur.fetchall()}
+    for vac in ontbrekend:
+        vac['beschrijving'] = teksten.get(str(vac['vacature_id']))
 
 
 def calculate_due_date(days=2):
     """Berekent deadline: X werkdagen vanaf nu (excl. weekenden en feestdagen)."""
-    nl_holidays = holidays.Netherlands()
-    due_date = datetime.now().date()
-    workdays_remaining = days
-    
-    while workdays_remaining > 0:
-        due_date += timedelta(days=1)
-        if due_date.weekday() < 5 and due_date not in nl_holidays:
-            workdays_remaining -= 1
-    
-    return due_date.isoformat()
+    return add_workdays(datetime.now().date(), days).isoformat()
 
 
-def get_due_date(vacature):
+def get_due_date(vacature, berekend=None):
     """
     Bepaalt de due date voor een Trello kaart.
     Gebruikt vacature deadline indien aanwezig, anders berekend.
     """
     if vacature.get('deadline'):
         return vacature['deadline'].isoformat() if hasattr(vacature['deadline'], 'isoformat') else str(vacature['deadline'])
-    return calculate_due_date(2)
+    return berekend or calculate_due_date(2)
+
+
+def get_due_dates(vacatures, days=2):
+    """get_due_date() voor een hele batch: {vacature_id: due date}, de berekende datum één keer."""
+    berekend = calculate_due_date(days)
+    return {str(vac['vacature_id']): get_due_date(vac, berekend) for vac in vacatures}
 
 
-def create_trello_card(vacature):
-    """Maakt een Trello kaart aan voor een vacature."""
+def retry_after_seconds(response, attempt):
+    """Wachttijd na een 429: Retry-After header indien aanwezig, anders exponentieel."""
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return min(2 ** attempt, 30)
+
+
+def trello_request(method, path, **kwargs):
+    """
+    Trello API call binnen de key- en token-limieten.
+    Bij een 429 liggen beide buckets stil tot Retry-After, daarna opnieuw proberen.
+    """
+    for attempt in range(TRELLO_MAX_RETRIES + 1):
+        with metrics.span('rate_limit_wait'):
+            trello_key_bucket.acquire()
+            trello_token_bucket.acquire()
+        metrics.count('trello_requests')
+        with metrics.span('trello'):
+            response = get_client().request(method, f"{TRELLO_API_URL}{path}", **kwargs)
+        
+        if response.status_code != 429 or attempt == TRELLO_MAX_RETRIES:
+            response.raise_for_status()
+            return response
+        
+        metrics.count('trello_429')
+        wait = retry_after_seconds(response, attempt)
+        print(f"Trello rate limit bereikt, {wait:.1f}s wachten...")
+        trello_key_bucket.pause(wait)
+        trello_token_bucket.pause(wait)
+
+
+def create_trello_card(vacature, labels=None, due=None):
+    """
+    Maakt een Trello kaart aan voor een vacature. Bestaat er op het bord een
+    label met de naam van de portal, dan krijgt de kaart dat label direct mee.
+    `due` is de vooraf berekende due date (zie get_due_dates).
+    """
     
     card_name = f"{vacature['titel']} - {vacature['portal_naam']}"
     if vacature['organisatie']:
@@ -99,45 +202,175 @@ def create_trello_card(vacature):
         'idList': TRELLO_LIST_ID,
         'name': card_name[:500],
         'desc': card_desc[:16384],
-        'due': get_due_date(vacature),
+        'due': due or get_due_date(vacature),
         'urlSource': vacature['url']
     }
+    label_id = (labels or {}).get(vacature['portal_naam'].lower())
+    if label_id:
+        params['idLabels'] = label_id
     
-    response = requests.post(
-        f"{TRELLO_API_URL}/cards",
-        params=params,
-        timeout=30
-    )
-    response.raise_for_status()
-    
+    response = trello_request('POST', '/cards', params=params, timeout=30)
     return response.json()
 
 
-def ensure_filter_passed(cur, vacature_id):
-    """Maakt FILTER_PASSED event aan als die nog niet bestaat (voor nu: skip keyword check)."""
+def attach_duplicate(card_id, vacature):
+    """Hangt de URL van een dubbele vacature als bijlage aan de kaart van het origineel."""
+    trello_request('POST', f"/cards/{card_id}/attachments", params={
+        'key': TRELLO_API_KEY,
+        'token': TRELLO_TOKEN,
+        'url': vacature['url'],
+        'name': f"Ook op {vacature['portal_naam']}: {vacature['titel']}"[:256]
+    }, timeout=30)
+
+
+def is_permanent_trello_error(error):
+    """True bij een 4xx van Trello (behalve 429): opnieuw proberen helpt dan niet."""
+    response = getattr(error, 'response', None)
+    return response is not None and 400 <= response.status_code < 500 and response.status_code != 429
+
+
+def attach_pending_duplicates(cur, limit=PROCESS_BATCH_SIZE):
+    """
+    Hangt maximaal `limit` duplicaten uit duplicaat_bijlagen aan de kaart van hun
+    origineel, voor zover dat origineel inmiddels een kaart heeft. Gelukte bijlagen
+    gaan uit de tabel. Een mislukte bijlage telt als poging; na
+    DUPLICATE_ATTACH_MAX_ATTEMPTS pogingen of bij een 4xx (bijv. kaart verwijderd)
+    blijft hij met de fout staan en wordt hij niet meer geprobeerd.
+    Geeft het aantal bijlagen terug.
+    """
+    cur.execute("""
+        SELECT w.vacature_id, w.pogingen, s.trello_card_id, v.url, v.titel, p.naam
+        FROM duplicaat_bijlagen w
+        JOIN vacature_status s ON s.vacature_id = w.origineel_id
+        JOIN vacatures v ON v.vacature_id = w.vacature_id
+        JOIN portals p ON p.portal_id = v.portal_id
+        WHERE s.trello_card_id IS NOT NULL AND w.fout IS NULL
+        ORDER BY w.created_at
+        LIMIT %s
+        FOR UPDATE OF w SKIP LOCKED
+    """, (limit,))
+    gelukt = []
+    mislukt = []
+    for vacature_id, pogingen, card_id, url, titel, portal_naam in cur.fetchall():
+        try:
+            attach_duplicate(card_id, {'url': url, 'titel': titel, 'portal_naam': portal_naam})
+        except requests.exceptions.RequestException as e:
+            print(f"  Bijlage voor {titel} mislukt: {e}")
+            metrics.count('bijlagen_mislukt')
+            opgeven = is_permanent_trello_error(e) or pogingen + 1 >= DUPLICATE_ATTACH_MAX_ATTEMPTS
+            mislukt.append((str(vacature_id), str(e)[:1000] if opgeven else None))
+            continue
+        gelukt.append(str(vacature_id))
+        print(f"  ↳ {titel} als bijlage aan kaart {card_id}")
+    if gelukt:
+        cur.execute("DELETE FROM duplicaat_bijlagen WHERE vacature_id = ANY(%s::uuid[])", (gelukt,))
+    if mislukt:
+        execute_values(cur, """
+            UPDATE duplicaat_bijlagen w
+            SET pogingen = w.pogingen + 1, fout = f.fout
+            FROM (VALUES %s) AS f (vacature_id, fout)
+            WHERE w.vacature_id = f.vacature_id::uuid
+        """, mislukt)
+    return len(gelukt)
+
+
+def trello_batch(paths):
+    """
+    Meerdere GET's in één Trello call via /batch (maximaal 10 paden).
+    Geeft per pad de data terug. De paden mogen geen komma's bevatten.
+    """
+    response = trello_request('GET', '/batch', params={
+        'key': TRELLO_API_KEY,
+        'token': TRELLO_TOKEN,
+        'urls': ','.join(paths)
+    }, timeout=60)
+    
+    results = []
+    for path, item in zip(paths, response.json()):
+        if '200' not in item:
+            raise requests.exceptions.HTTPError(f"Trello batch {path}: {item}")
+        results.append(item['200'])
+    return results
+
+
+def load_board_metadata(cur):
+    """
+    Haalt in één batch call de lijsten, labels en kaarten van het bord op.
+    De lijsten komen in trello_lijsten (nodig voor de ADDED_TO_TRELLO events).
+    Geeft (labels, orphans) terug: {labelnaam: label_id} en {vacature url: kaart}.
+    
+    Via de urlSource-bijlage van de kaarten herkennen we kaarten die wel zijn
+    aangemaakt maar waarvan het ADDED_TO_TRELLO event ontbreekt (bijv. na een crash).
+    """
+    # Pagina-parameters zonder komma's: /batch splitst de urls op komma's
+    if TRELLO_BOARD_ID:
+        lists, labels, cards = trello_batch([
+            f"/boards/{TRELLO_BOARD_ID}/lists",
+            f"/boards/{TRELLO_BOARD_ID}/labels?limit=1000",
+            f"/boards/{TRELLO_BOARD_ID}/cards?fields=idList&attachments=true&attachment_fields=url",
+        ])
+    else:
+        lijst, cards = trello_batch([
+            f"/lists/{TRELLO_LIST_ID}",
+            f"/lists/{TRELLO_LIST_ID}/cards?fields=idList&attachments=true&attachment_fields=url",
+        ])
+        lists, labels = [lijst], []
+    
+    if lists:
+        execute_values(cur, """
+            INSERT INTO trello_lijsten (trello_lijst_id, naam, volgorde, is_actief)
+            VALUES %s
+            ON CONFLICT (trello_lijst_id) DO UPDATE SET
+                naam = EXCLUDED.naam, volgorde = EXCLUDED.volgorde, is_actief = EXCLUDED.is_actief
+            WHERE (trello_lijsten.naam, trello_lijsten.volgorde, trello_lijsten.is_actief)
+                IS DISTINCT FROM (EXCLUDED.naam, EXCLUDED.volgorde, EXCLUDED.is_actief)
+        """, [
+            (lijst['id'], lijst['name'][:100], volgorde, not lijst.get('closed', False))
+            for volgorde, lijst in enumerate(sorted(lists, key=lambda lijst: lijst.get('pos', 0)))
+        ])
+    
+    orphans = {}
+    for card in cards:
+        for attachment in card.get('attachments', []):
+            if attachment.get('url'):
+                orphans[attachment['url']] = card
+    
+    label_ids = {label['name'].lower(): label['id'] for label in labels if label.get('name')}
+    print(f"Bord: {len(lists)} lijsten, {len(label_ids)} labels, {len(cards)} kaarten")
+    return label_ids, orphans
+
+
+def log_added_to_trello(cur, vacature_id, card_id, lijst_id, bron='processor'):
+    """Legt het ADDED_TO_TRELLO event vast."""
     cur.execute("""
-        INSERT INTO vacature_events (vacature_id, event_type, bron)
-        SELECT %s, 'FILTER_PASSED', 'processor:auto'
-        WHERE NOT EXISTS (
-            SELECT 1 FROM vacature_events 
-            WHERE vacature_id = %s AND event_type = 'FILTER_PASSED'
-        )
-    """, (str(vacature_id), str(vacature_id)))
+        INSERT INTO vacature_events 
+        (vacature_id, event_type, bron, trello_card_id, trello_lijst_id)
+        VALUES (%s, 'ADDED_TO_TRELLO', %s, %s, %s)
+    """, (str(vacature_id), bron, card_id, lijst_id))
 
 
 def process_vacatures():
-    """Hoofdfunctie: verwerkt alle nieuwe vacatures naar Trello."""
+    """
+    Hoofdfunctie: verwerkt alle nieuwe vacatures naar Trello.
+    Werk wordt per batch geclaimd (FOR NO KEY UPDATE SKIP LOCKED op een aparte connectie)
+    en elk kaart-event wordt direct gecommit, zodat meerdere processors naast
+    elkaar kunnen draaien en een afgebroken run veilig hervat kan worden.
+    """
     print("Start processor...")
+    metrics.reset()
     
     if not all([TRELLO_API_KEY, TRELLO_TOKEN, TRELLO_LIST_ID]):
         raise ValueError("Trello credentials ontbreken in .env")
     
     conn = None
+    claim_conn = None
     run_id = None
     
     try:
         conn = psycopg2.connect(DATABASE_URL)
         cur = conn.cursor()
+        claim_conn = psycopg2.connect(DATABASE_URL)
+        claim_cur = claim_conn.cursor()
         
         # Start job run logging
         cur.execute("""
@@ -146,78 +379,147 @@ def process_vacatures():
             RETURNING run_id
         """)
         run_id = cur.fetchone()[0]
+        conn.commit()
         print(f"Job run gestart met ID: {run_id}")
         
-        vacatures = get_unprocessed_vacatures(cur)
-        print(f"Gevonden: {len(vacatures)} onverwerkte vacatures")
-        
-        if not vacatures:
-            cur.execute("""
-                UPDATE job_runs 
-                SET eind_tijd = NOW(), status = 'SUCCESS', items_processed = 0
-                WHERE run_id = %s
-            """, (run_id,))
-            conn.commit()
-            print("Niets te verwerken.")
-            return
-        
         success_count = 0
         error_count = 0
+        filtered_count = 0
+        duplicate_count = 0
+        attempted = 0
+        labels = orphans = None
+        after = None
         
-        for vac in vacatures:
-            try:
-                # Ensure FILTER_PASSED event exists
-                ensure_filter_passed(cur, vac['vacature_id'])
-                
-                # Create Trello card
-                card = create_trello_card(vac)
-                card_id = card['id']
-                
-                # Log ADDED_TO_TRELLO event
-                cur.execute("""
-                    INSERT INTO vacature_events 
-                    (vacature_id, event_type, bron, trello_card_id, trello_lijst_id)
-                    VALUES (%s, 'ADDED_TO_TRELLO', 'processor', %s, %s)
-                """, (str(vac['vacature_id']), card_id, TRELLO_LIST_ID))
-                
-                success_count += 1
-                print(f"✓ {vac['titel']}")
+        while True:
+            # Duplicaten van vorige batches/runs waarvan het origineel nu een kaart heeft
+            attach_pending_duplicates(cur)
+            conn.commit()
+            
+            with metrics.span('claim'):
+                vacatures, laatste = get_unprocessed_vacatures(claim_cur, PROCESS_BATCH_SIZE, after=after)
+            if laatste is None:
+                claim_conn.commit()
+                break
+            # Volgende batch begint na de laatste geclaimde vacature, dus mislukte
+            # vacatures komen pas bij een volgende run weer langs.
+            after = laatste
+            if not vacatures:
+                # Hele batch al afgerond door een andere processor: verder in de werkvoorraad
+                claim_conn.commit()
+                continue
+            
+            print(f"Batch geclaimd: {len(vacatures)} vacatures")
+            attempted += len(vacatures)
+            
+            # FILTER stap voor vacatures die nog niet gefilterd zijn
+            te_filteren = [vac for vac in vacatures if not vac['has_filter_passed']]
+            with metrics.span('beschrijving_laden'):
+                load_beschrijvingen(cur, te_filteren)
+            with metrics.span('filter'):
+                doorgelaten, gefilterd = filter_vacatures(cur, te_filteren)
+                conn.commit()
+            filtered_count += len(gefilterd)
+            for vac, keyword in gefilterd:
+                print(f"⊘ {vac['titel']} (keyword: {keyword})")
+            vacatures = [vac for vac in vacatures if vac['has_filter_passed']] + doorgelaten
+            
+            # Kaarten die al bestaan maar geen event hebben: alleen het event vastleggen
+            if orphans is None:
+                with metrics.span('board_metadata'):
+                    labels, orphans = load_board_metadata(cur)
+                    conn.commit()
+            nieuw = []
+            for vac in vacatures:
+                card = orphans.get(vac['url'])
+                if card:
+                    with metrics.span('db_write'):
+                        log_added_to_trello(cur, vac['vacature_id'], card['id'],
+                                            card.get('idList') or TRELLO_LIST_ID, bron='processor:reconcile')
+                        conn.commit()
+                    success_count += 1
+                    print(f"↺ {vac['titel']} (bestaande kaart {card['id']})")
+                else:
+                    nieuw.append(vac)
+            
+            # Dubbele vacatures (zelfde opdracht op een andere portal) krijgen geen eigen kaart
+            with metrics.span('beschrijving_laden'):
+                load_beschrijvingen(cur, nieuw)
+            with metrics.span('dedup'):
+                nieuw, duplicaten = dedup_vacatures(cur, nieuw)
+                conn.commit()
+            duplicate_count += len(duplicaten)
+            # De bijlage aan de kaart van het origineel volgt via duplicaat_bijlagen,
+            # ook als het origineel pas in deze batch (of later) een kaart krijgt
+            for vac, origineel_id, score in duplicaten:
+                print(f"≈ {vac['titel']} (duplicaat {score:.0%} van {origineel_id})")
+            
+            # Kaarten parallel aanmaken; elk event direct committen zodra het binnen is
+            due_dates = get_due_dates(nieuw)
+            with ThreadPoolExecutor(max_workers=TRELLO_CONCURRENCY) as pool:
+                futures = {
+                    pool.submit(create_trello_card, vac, labels, due_dates[str(vac['vacature_id'])]): vac
+                    for vac in nieuw
+                }
                 
-            except requests.exceptions.RequestException as e:
-                error_count += 1
-                print(f"✗ {vac['titel']}: Trello fout - {e}")
-            except Exception as e:
-                error_count += 1
-                print(f"✗ {vac['titel']}: {e}")
+                for future in as_completed(futures):
+                    vac = futures[future]
+                    try:
+                        card_id = future.result()['id']
+                        with metrics.span('db_write'):
+                            log_added_to_trello(cur, vac['vacature_id'], card_id, TRELLO_LIST_ID)
+                            conn.commit()
+                        
+                        success_count += 1
+                        print(f"✓ {vac['titel']}")
+                        
+                    except requests.exceptions.RequestException as e:
+                        error_count += 1
+                        print(f"✗ {vac['titel']}: Trello fout - {e}")
+                    except psycopg2.Error:
+                        raise
+                    except Exception as e:
+                        error_count += 1
+                        print(f"✗ {vac['titel']}: {e}")
+            
+            # Batch klaar: locks vrijgeven
+            claim_conn.commit()
         
         # Update job run
         status = 'SUCCESS' if error_count == 0 else 'FAILED'
         cur.execute("""
             UPDATE job_runs 
             SET eind_tijd = NOW(), status = %s, 
-                items_processed = %s, items_success = %s, items_failed = %s
+                items_processed = %s, items_success = %s, items_failed = %s, stappen = %s
             WHERE run_id = %s
-        """, (status, len(vacatures), success_count, error_count, run_id))
+        """, (status, attempted, success_count, error_count, Json(metrics.breakdown()), run_id))
         
         conn.commit()
-        print(f"\nKlaar! Succes: {success_count}, Fouten: {error_count}")
+        if not attempted:
+            print("Niets te verwerken.")
+        else:
+            print(f"\nKlaar! Succes: {success_count}, Gefilterd: {filtered_count}, "
+                  f"Duplicaat: {duplicate_count}, Fouten: {error_count}")
+            print(f"Stappen: {metrics.summary()}")
         
-    except psycopg2.Error as e:
-        print(f"Database fout: {e}")
+    except (psycopg2.Error, requests.exceptions.RequestException) as e:
+        soort = 'Database' if isinstance(e, psycopg2.Error) else 'Trello'
+        print(f"{soort} fout: {e}")
+        if conn:
+            conn.rollback()
         if conn and run_id:
             try:
                 cur.execute("""
                     UPDATE job_runs 
-                    SET eind_tijd = NOW(), status = 'FAILED', error_message = %s
+                    SET eind_tijd = NOW(), status = 'FAILED', error_message = %s, stappen = %s
                     WHERE run_id = %s
-                """, (str(e), run_id))
+                """, (str(e), Json(metrics.breakdown()), run_id))
                 conn.commit()
-            except:
-                pass
-        if conn:
-            conn.rollback()
+            except psycopg2.Error:
+                conn.rollback()
         raise
     finally:
+        if claim_conn:
+            claim_conn.close()
         if conn:
             conn.close()
 
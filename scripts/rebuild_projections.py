@@ -0,0 +1,60 @@
+"""
+Projecties opnieuw opbouwen
+Vult de afgeleide tabellen vacature_pipeline (werkvoorraad) en vacature_status
+(laatste event, achter v_vacature_status) opnieuw vanuit vacatures en vacature_events.
+
+Normaal houden triggers deze tabellen bij; opnieuw opbouwen is nodig na het
+toevoegen aan een bestaande database of na handmatig ingrijpen in de events.
+
+Gebruik:
+  python scripts/rebuild_projections.py            - Beide tabellen
+  python scripts/rebuild_projections.py status     - Alleen vacature_status
+  python scripts/rebuild_projections.py pipeline   - Alleen vacature_pipeline
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+import psycopg2
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Naam op de command line -> (tabel, SQL functie uit schema.sql)
+PROJECTIES = {
+    'pipeline': ('vacature_pipeline', 'rebuild_vacature_pipeline'),
+    'status': ('vacature_status', 'rebuild_vacature_status'),
+}
+
+
+def rebuild(namen):
+    """Bouwt de gevraagde projecties opnieuw op, elk in een eigen transactie."""
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        for naam in namen:
+            tabel, functie = PROJECTIES[naam]
+            print(f"{tabel} opnieuw opbouwen...")
+            cur.execute(f"SELECT {functie}()")
+            aantal = cur.fetchone()[0]
+            conn.commit()
+            print(f"✓ {tabel}: {aantal} rijen")
+    except psycopg2.Error as e:
+        print(f"Database fout: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    namen = sys.argv[1:] or list(PROJECTIES)
+    onbekend = [naam for naam in namen if naam not in PROJECTIES]
+    if onbekend:
+        print("Usage:")
+        print("  python rebuild_projections.py              - Beide tabellen")
+        print("  python rebuild_projections.py status       - Alleen vacature_status")
+        print("  python rebuild_projections.py pipeline     - Alleen vacature_pipeline")
+        sys.exit(1)
+    rebuild(namen)
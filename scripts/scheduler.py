@@ -0,0 +1,207 @@
+"""
+Scheduler
+Eén langlopend proces dat scrapen, verwerken (filter, dedup, Trello) en het
+aanmaken van event-partities als jobs in hetzelfde proces plant, in plaats van
+losse scripts vanuit cron. Imports, de gedeelde HTTP sessie, de gecompileerde
+keyword-filter en andere state blijven zo tussen runs warm.
+
+Elke job heeft een interval met jitter en draait nooit twee keer tegelijk. De
+processor draait daarnaast direct zodra de scraper nieuwe vacatures opslaat:
+een trigger op vacature_events stuurt NOTIFY nieuwe_vacatures, de scheduler
+luistert daarop (LISTEN) en start de processor na een korte wachttijd, zodat
+een hele scrape-run in één processor-run valt.
+
+Gebruik:
+  python scripts/scheduler.py              - Scraper, processor en partities plannen
+  python scripts/scheduler.py --webhook    - Idem, en de webhook listener in hetzelfde proces
+"""
+
+import os
+import random
+import select
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+import psycopg2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'portals'))
+import runner  # noqa: E402
+import processor  # noqa: E402
+from event_partitions import create_partitions  # noqa: E402
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+SCHEDULE_SCRAPE_MINUTES = float(os.getenv('SCHEDULE_SCRAPE_MINUTES', '30'))
+# Vangnet naast LISTEN/NOTIFY: ook zonder melding draait de processor zo vaak
+SCHEDULE_PROCESS_MINUTES = float(os.getenv('SCHEDULE_PROCESS_MINUTES', '15'))
+SCHEDULE_JITTER_SECONDS = float(os.getenv('SCHEDULE_JITTER_SECONDS', '60'))
+# Na een melding zo lang wachten, zodat de volgende pagina's van dezelfde scrape meekomen
+SCHEDULE_NOTIFY_DELAY_SECONDS = float(os.getenv('SCHEDULE_NOTIFY_DELAY_SECONDS', '5'))
+SCHEDULE_PARTITIONS_HOURS = 24
+# Bij stoppen maximaal zo lang wachten op lopende jobs
+SHUTDOWN_TIMEOUT = 120
+
+NOTIFY_CHANNEL = 'nieuwe_vacatures'
+
+stop = threading.Event()
+
+
+class Job:
+    """
+    Een periodieke job in een eigen thread. Na elke run wordt de volgende run
+    gepland op interval + willekeurige jitter; trigger() haalt hem naar voren.
+    """
+
+    def __init__(self, naam, functie, interval, jitter=SCHEDULE_JITTER_SECONDS):
+        self.naam = naam
+        self.functie = functie
+        self.interval = interval
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.wakker = threading.Event()
+        # Eerste run direct, gespreid over de jitter zodat niet alles tegelijk start
+        self.volgende = time.monotonic() + random.uniform(0, jitter)
+        self.thread = threading.Thread(target=self.loop, name=f"job-{naam}", daemon=True)
+
+    def trigger(self, vertraging=0):
+        """Laat de job uiterlijk over `vertraging` seconden draaien (ook als hij nu al loopt)."""
+        with self.lock:
+            self.volgende = min(self.volgende, time.monotonic() + vertraging)
+        self.wakker.set()
+
+    def loop(self):
+        while not stop.is_set():
+            with self.lock:
+                wacht = self.volgende - time.monotonic()
+                if wacht <= 0:
+                    self.volgende = time.monotonic() + self.interval + random.uniform(0, self.jitter)
+            if wacht > 0:
+                self.wakker.wait(wacht)
+                self.wakker.clear()
+                continue
+            self.run()
+
+    def run(self):
+        start = time.monotonic()
+        print(f"[scheduler] {self.naam} gestart")
+        try:
+            self.functie()
+            print(f"[scheduler] {self.naam} klaar in {time.monotonic() - start:.1f}s")
+        except Exception as e:
+            # Fouten zijn al gelogd in job_runs; de volgende run probeert het gewoon opnieuw
+            print(f"[scheduler] {self.naam} mislukt na {time.monotonic() - start:.1f}s: {e}")
+
+
+def scrape_job(portal_id):
+    """Scraped één portal, als hij (nog) actief is."""
+    def scrape():
+        if portal_id not in runner.get_active_portals():
+            print(f"[scheduler] {portal_id} is niet actief, overgeslagen")
+            return
+        runner.SCRAPERS[portal_id]().run()
+    return scrape
+
+
+def create_partitions_job():
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        aantal = create_partitions(conn.cursor())
+        conn.commit()
+        if aantal:
+            print(f"[scheduler] {aantal} nieuwe event-partities aangemaakt")
+    finally:
+        conn.close()
+
+
+def listen(job):
+    """
+    Luistert naar nieuwe vacatures en triggert `job`. Na een (her)verbinding
+    draait de job sowieso, want in de tussentijd kan er een melding gemist zijn.
+    """
+    while not stop.is_set():
+        conn = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+            job.trigger(SCHEDULE_NOTIFY_DELAY_SECONDS)
+            while not stop.is_set():
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    aantal = sum(int(melding.payload or 0) for melding in conn.notifies)
+                    conn.notifies.clear()
+                    print(f"[scheduler] {aantal} nieuwe vacature(s), processor over "
+                          f"{SCHEDULE_NOTIFY_DELAY_SECONDS:.0f}s")
+                    job.trigger(SCHEDULE_NOTIFY_DELAY_SECONDS)
+        except psycopg2.Error as e:
+            print(f"[scheduler] LISTEN verbinding verbroken: {e}")
+            stop.wait(5)
+        finally:
+            if conn:
+                conn.close()
+
+
+def start_webhook_listener():
+    """Start de webhook listener (workers en Flask server) in dit proces."""
+    import webhook_listener
+    webhook_listener.start_workers()
+    threading.Thread(
+        target=webhook_listener.app.run,
+        kwargs={'host': '0.0.0.0', 'port': webhook_listener.WEBHOOK_PORT, 'threaded': True},
+        name='webhook-server',
+        daemon=True
+    ).start()
+
+
+def stop_webhook_listener():
+    import webhook_listener
+    webhook_listener.finish_listener_run()
+
+
+def main(webhook=False):
+    jobs = [
+        Job(f"scrape:{portal_id}", scrape_job(portal_id), SCHEDULE_SCRAPE_MINUTES * 60)
+        for portal_id in runner.SCRAPERS
+    ]
+    process_job = Job('process', processor.process_vacatures, SCHEDULE_PROCESS_MINUTES * 60)
+    jobs.append(process_job)
+    jobs.append(Job('partities', create_partitions_job, SCHEDULE_PARTITIONS_HOURS * 3600))
+
+    if webhook:
+        start_webhook_listener()
+    for job in jobs:
+        job.thread.start()
+    threading.Thread(target=listen, args=(process_job,), name='listen-vacatures', daemon=True).start()
+    print(f"[scheduler] Gestart met {len(jobs)} jobs: {', '.join(job.naam for job in jobs)}")
+
+    # Netjes stoppen: lopende runs afmaken, geen nieuwe meer starten
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+    print("[scheduler] Stoppen, wachten op lopende jobs...")
+    for job in jobs:
+        job.wakker.set()
+    deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+    for job in jobs:
+        job.thread.join(max(0, deadline - time.monotonic()))
+    if webhook:
+        stop_webhook_listener()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if any(arg != '--webhook' for arg in args):
+        print("Usage:")
+        print("  python scheduler.py              - Scraper, processor en partities plannen")
+        print("  python scheduler.py --webhook    - Idem, en de webhook listener in hetzelfde proces")
+        sys.exit(1)
+    main(webhook='--webhook' in args)
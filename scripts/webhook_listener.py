@@ -1,15 +1,38 @@
 """
 Trello Webhook Listener
 Ontvangt events van Trello en logt ze in de database.
+
+Elke actie wordt eerst in een duurzame lokale queue gezet (webhook_queue.py) en
+Trello krijgt direct een 200. Achtergrond-workers schrijven de acties in
+batches naar de database via een gedeelde connection pool.
+
+GET /metrics geeft de tijd per stap en tellers sinds de start in het
+Prometheus tekstformaat.
+
+GET /search?q=... zoekt in de vacatures (titel en beschrijving), beste
+resultaat eerst, per pagina via de cursor in 'next'.
 """
 
 import os
+import sys
 import json
-from flask import Flask, request, jsonify
+import threading
+import time
+import uuid
+from pathlib import Path
+from flask import Flask, Response, request, jsonify
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 import requests
 
+from webhook_queue import WebhookQueue
+from card_cache import CardCache
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.metrics import Metrics  # noqa: E402
+
 load_dotenv()
 
 app = Flask(__name__)
@@ -19,6 +42,19 @@ TRELLO_API_KEY = os.getenv('TRELLO_API_KEY')
 TRELLO_TOKEN = os.getenv('TRELLO_TOKEN')
 TRELLO_BOARD_ID = os.getenv('TRELLO_BOARD_ID')
 
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', '2'))
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', '100'))
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '5000'))
+# Eigen pool voor GET /search, zodat zoekopdrachten de workers nooit verbindingen afpakken
+SEARCH_CONNECTIONS = 2
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+# Wachttijd voordat een batch opnieuw geprobeerd wordt als de database onbereikbaar is
+DB_RETRY_SECONDS = 10
+# Backfill: maximum van de Trello actions API per pagina, en welke acties we loggen
+BACKFILL_PAGE_SIZE = 1000
+BACKFILL_ACTION_TYPES = ('updateCard', 'addLabelToCard')
+
 # Mapping van Trello action types naar onze event types
 ACTION_TYPE_MAP = {
     'updateCard': 'TRELLO_MOVED',  # Als listAfter/listBefore aanwezig
@@ -27,25 +63,39 @@ ACTION_TYPE_MAP = {
     'updateCard:closed': 'TRELLO_ARCHIVED',
 }
 
+queue = None
+db_pool = None
+search_pool = None
+# job_runs regel van deze listener (WEBHOOK); backfill() gebruikt de starttijd
+listener_run_id = None
+card_cache = CardCache()
+queue_signal = threading.Event()
+# Totalen sinds de start, voor /metrics
+metrics = Metrics()
+
 
 def get_db_connection():
     return psycopg2.connect(DATABASE_URL)
 
 
-def find_vacature_by_card_id(cur, card_id):
-    """Zoekt vacature_id op basis van trello_card_id in events."""
+def find_vacatures_by_card_ids(cur, card_ids):
+    """
+    Zoekt vacature_id op basis van trello_card_id. Geeft {card_id: vacature_id}.
+    Via de projectie vacature_status, zodat gearchiveerde events niet uitmaken.
+    """
     cur.execute("""
-        SELECT DISTINCT vacature_id 
-        FROM vacature_events 
-        WHERE trello_card_id = %s
-        LIMIT 1
-    """, (card_id,))
-    result = cur.fetchone()
-    return result[0] if result else None
+        SELECT trello_card_id, vacature_id
+        FROM vacature_status 
+        WHERE trello_card_id = ANY(%s)
+    """, (list(card_ids),))
+    return dict(cur.fetchall())
 
 
-def process_webhook_action(action):
-    """Verwerkt een Trello webhook action en slaat op in database."""
+def parse_action(action):
+    """
+    Vertaalt een Trello webhook action naar een event (dict), of None als we
+    de actie niet loggen.
+    """
     action_type = action.get('type')
     data = action.get('data', {})
     card = data.get('card', {})
@@ -57,82 +107,276 @@ def process_webhook_action(action):
     member = action.get('memberCreator', {})
     member_name = member.get('fullName') or member.get('username')
     
-    conn = None
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Zoek vacature bij deze card
-        vacature_id = find_vacature_by_card_id(cur, card_id)
-        if not vacature_id:
-            print(f"Geen vacature gevonden voor card {card_id}")
-            return None
-        
-        event_type = None
-        trello_lijst_id = None
-        trello_label = None
+    event_type = None
+    trello_lijst_id = None
+    lijst_naam = None
+    trello_label = None
+    
+    # Bepaal event type
+    if action_type == 'updateCard':
+        list_after = data.get('listAfter')
+        list_before = data.get('listBefore')
         
-        # Bepaal event type
-        if action_type == 'updateCard':
-            list_after = data.get('listAfter')
-            list_before = data.get('listBefore')
+        if list_after and list_before:
+            # Card is verplaatst
+            event_type = 'TRELLO_MOVED'
+            trello_lijst_id = list_after.get('id')
+            lijst_naam = list_after.get('name', 'Onbekend')
             
-            if list_after and list_before:
-                # Card is verplaatst
-                event_type = 'TRELLO_MOVED'
-                trello_lijst_id = list_after.get('id')
-                
-                # Zorg dat nieuwe lijst in trello_lijsten staat
-                cur.execute("""
-                    INSERT INTO trello_lijsten (trello_lijst_id, naam, volgorde)
-                    VALUES (%s, %s, 0)
-                    ON CONFLICT (trello_lijst_id) DO UPDATE SET naam = EXCLUDED.naam
-                """, (trello_lijst_id, list_after.get('name', 'Onbekend')))
-                
-            elif data.get('card', {}).get('closed') == True:
-                event_type = 'TRELLO_ARCHIVED'
-                
-        elif action_type == 'addLabelToCard':
-            event_type = 'TRELLO_LABEL_ADDED'
-            label = data.get('label', {})
-            trello_label = label.get('name')
+        elif card.get('closed') == True:
+            event_type = 'TRELLO_ARCHIVED'
             
-        elif action_type == 'removeLabelFromCard':
-            # We loggen dit niet als apart event type, skip
-            return None
-        
-        if not event_type:
-            return None
+    elif action_type == 'addLabelToCard':
+        event_type = 'TRELLO_LABEL_ADDED'
+        label = data.get('label', {})
+        trello_label = label.get('name')
         
-        # Insert event
-        cur.execute("""
-            INSERT INTO vacature_events 
-            (vacature_id, event_type, bron, trello_card_id, trello_lijst_id, trello_user, trello_label)
-            VALUES (%s, %s, 'webhook', %s, %s, %s, %s)
-            RETURNING event_id
-        """, (
-            str(vacature_id),
-            event_type,
-            card_id,
-            trello_lijst_id,
-            member_name,
-            trello_label
-        ))
-        
-        event_id = cur.fetchone()[0]
+    elif action_type == 'removeLabelFromCard':
+        # We loggen dit niet als apart event type, skip
+        return None
+    
+    if not event_type:
+        return None
+    
+    return {
+        'action_id': action.get('id'),
+        'card_id': card_id,
+        'event_type': event_type,
+        'trello_lijst_id': trello_lijst_id,
+        'lijst_naam': lijst_naam[:100] if lijst_naam else lijst_naam,
+        'trello_user': member_name[:100] if member_name else None,
+        'trello_label': trello_label[:100] if trello_label else None,
+        # Tijdstip van de actie bij Trello, niet van verwerking uit de queue
+        'tijdstip': action.get('date'),
+    }
+
+
+def store_actions(conn, actions, bron='webhook'):
+    """
+    Schrijft een batch Trello acties naar de database in één transactie:
+    één opzoeking voor alle kaarten, één upsert voor de lijsten, één INSERT voor de events.
+    Acties die al zijn opgeslagen (zelfde Trello action id) worden overgeslagen.
+    Geeft het aantal nieuw opgeslagen events terug.
+    """
+    events = [event for event in map(parse_action, actions) if event]
+    if not events:
+        return 0
+    
+    cur = conn.cursor()
+    with metrics.span('card_lookup'):
+        vacatures = card_cache.lookup(cur, {event['card_id'] for event in events}, find_vacatures_by_card_ids)
+    for event in events:
+        if event['card_id'] not in vacatures:
+            print(f"Geen vacature gevonden voor card {event['card_id']}")
+    events = [event for event in events if event['card_id'] in vacatures]
+    if not events:
         conn.commit()
-        
-        print(f"Event {event_id}: {event_type} voor vacature {vacature_id}")
-        return event_id
-        
+        return 0
+    
+    # Zorg dat nieuwe of hernoemde lijsten in trello_lijsten staan (laatste naam wint)
+    lijsten = card_cache.changed_lists({
+        event['trello_lijst_id']: event['lijst_naam']
+        for event in events if event['trello_lijst_id']
+    })
+    if lijsten:
+        execute_values(cur, """
+            INSERT INTO trello_lijsten (trello_lijst_id, naam, volgorde)
+            VALUES %s
+            ON CONFLICT (trello_lijst_id) DO UPDATE SET naam = EXCLUDED.naam
+        """, list(lijsten.items()), template="(%s, %s, 0)")
+    
+    nieuw = execute_values(cur, """
+        INSERT INTO vacature_events 
+        (vacature_id, event_type, bron, trello_card_id, trello_lijst_id, trello_user, trello_label,
+         trello_action_id, tijdstip)
+        VALUES %s
+        ON CONFLICT (trello_action_id, tijdstip) DO NOTHING
+        RETURNING vacature_id, event_type
+    """, [
+        (
+            str(vacatures[event['card_id']]),
+            event['event_type'],
+            bron,
+            event['card_id'],
+            event['trello_lijst_id'],
+            event['trello_user'],
+            event['trello_label'],
+            event['action_id'],
+            event['tijdstip'],
+        )
+        for event in events
+    ], template="(%s, %s, %s, %s, %s, %s, %s, %s, COALESCE(%s::timestamptz, NOW()))",
+        page_size=len(events), fetch=True)
+    conn.commit()
+    card_cache.remember_lists(lijsten)
+    metrics.count('events_opgeslagen', len(nieuw))
+    
+    for vacature_id, event_type in nieuw:
+        print(f"{event_type} voor vacature {vacature_id}")
+    if len(nieuw) < len(events):
+        print(f"{len(events) - len(nieuw)} acties waren al opgeslagen")
+    return len(nieuw)
+
+
+def drain_batch():
+    """
+    Verwerkt één batch uit de queue. Geeft het aantal geclaimde acties terug.
+    Mislukt de batch (SQL fout, maar ook een misvormde actie), dan wordt elke
+    actie los geprobeerd zodat één foute actie de rest niet blokkeert; is de
+    database onbereikbaar, dan gaat alles terug.
+    """
+    items = queue.claim(WEBHOOK_BATCH_SIZE)
+    if not items:
+        return 0
+    
+    conn = None
+    try:
+        conn = db_pool.getconn()
+        with metrics.span('db_write'):
+            store_actions(conn, [action for _, action in items])
+        queue.ack([action_id for action_id, _ in items])
+        metrics.count('acties_verwerkt', len(items))
+    except (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError) as e:
+        # PoolError: alle verbindingen in gebruik, dus ook later opnieuw proberen
+        print(f"Database onbereikbaar, {len(items)} acties blijven in de queue: {e}")
+        queue.release([action_id for action_id, _ in items], DB_RETRY_SECONDS)
+        metrics.count('db_onbereikbaar')
+        time.sleep(DB_RETRY_SECONDS)
     except Exception as e:
-        print(f"Fout bij verwerken webhook: {e}")
-        if conn:
+        print(f"Fout bij verwerken batch, acties worden los geprobeerd: {e}")
+        if conn and not conn.closed:
             conn.rollback()
-        return None
+        for i, (action_id, action) in enumerate(items):
+            try:
+                with metrics.span('db_write'):
+                    store_actions(conn, [action])
+                queue.ack([action_id])
+                metrics.count('acties_verwerkt')
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                # Verbinding weg: dit is geen fout van de actie, de rest gaat terug
+                print(f"Database onbereikbaar, {len(items) - i} acties blijven in de queue: {e}")
+                queue.release([action_id for action_id, _ in items[i:]], DB_RETRY_SECONDS)
+                metrics.count('db_onbereikbaar')
+                break
+            except Exception as e:
+                # Ook een misvormde actie (bijv. "data": null) telt als poging,
+                # zodat hij na WEBHOOK_MAX_ATTEMPTS blijft staan in plaats van de batch te blokkeren
+                print(f"Fout bij verwerken webhook {action_id}: {e}")
+                if conn and not conn.closed:
+                    conn.rollback()
+                queue.fail(action_id, e)
+                metrics.count('acties_mislukt')
     finally:
         if conn:
-            conn.close()
+            db_pool.putconn(conn, close=bool(conn.closed))
+    return len(items)
+
+
+def search_vacatures(cur, zoekterm, limit=SEARCH_DEFAULT_LIMIT, na=None):
+    """
+    Zoekt vacatures op titel en beschrijving (full-text, dutch) of op een stuk van
+    de titel (ILIKE, trigram-index). Beste score eerst; `na` is de (score,
+    vacature_id) van het laatste resultaat van de vorige pagina.
+    """
+    patroon = '%' + zoekterm.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    vervolg = "WHERE (score, vacature_id) < (%(na_score)s::float8, %(na_id)s::uuid)" if na else ""
+    cur.execute(f"""
+        SELECT vacature_id, titel, organisatie, locatie, portal_id, url, eerste_gezien_op, score
+        FROM (
+            SELECT v.vacature_id, v.titel, v.organisatie, v.locatie, v.portal_id, v.url,
+                   v.eerste_gezien_op,
+                   ts_rank_cd(v.zoekvector, z.query)::float8 + similarity(v.titel, %(zoekterm)s) AS score
+            FROM vacatures v, websearch_to_tsquery('dutch', %(zoekterm)s) z(query)
+            WHERE v.zoekvector @@ z.query OR v.titel ILIKE %(patroon)s
+        ) r
+        {vervolg}
+        ORDER BY score DESC, vacature_id DESC
+        LIMIT %(limit)s
+    """, {
+        'zoekterm': zoekterm,
+        'patroon': patroon,
+        'limit': limit,
+        'na_score': na[0] if na else None,
+        'na_id': na[1] if na else None,
+    })
+    kolommen = [kolom.name for kolom in cur.description]
+    return [dict(zip(kolommen, row)) for row in cur.fetchall()]
+
+
+def parse_search_cursor(cursor):
+    """'<score>:<vacature_id>' uit 'next' -> (score, vacature_id). ValueError als hij ongeldig is."""
+    score, _, vacature_id = cursor.partition(':')
+    return float(score), str(uuid.UUID(vacature_id))
+
+
+def worker_loop():
+    """Achtergrond-worker: leegt de queue en wacht daarna op nieuwe acties."""
+    while True:
+        try:
+            if drain_batch():
+                continue
+        except Exception as e:
+            print(f"Webhook worker fout: {e}")
+            time.sleep(1)
+        queue_signal.wait(timeout=1.0)
+        queue_signal.clear()
+
+
+def start_listener_run(cur):
+    """
+    Legt de start van de listener vast in job_runs. Een vorige run die nog op
+    RUNNING staat is niet netjes gestopt; vanaf dat moment kunnen acties gemist zijn.
+    """
+    cur.execute("""
+        UPDATE job_runs
+        SET eind_tijd = NOW(), status = 'FAILED', error_message = 'Listener niet netjes gestopt'
+        WHERE job_type = 'WEBHOOK' AND status = 'RUNNING'
+    """)
+    cur.execute("""
+        INSERT INTO job_runs (job_type, start_tijd, status)
+        VALUES ('WEBHOOK', NOW(), 'RUNNING')
+        RETURNING run_id
+    """)
+    return cur.fetchone()[0]
+
+
+def finish_listener_run():
+    """Sluit de job_runs regel van de listener af bij een nette stop."""
+    if not listener_run_id:
+        return
+    conn = get_db_connection()
+    try:
+        conn.cursor().execute("""
+            UPDATE job_runs
+            SET eind_tijd = NOW(), status = 'SUCCESS'
+            WHERE run_id = %s
+        """, (listener_run_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def start_workers():
+    """Opent de queue en de connection pools en start de workers."""
+    global queue, db_pool, search_pool, listener_run_id
+    queue = WebhookQueue()
+    queue.reset_claims()
+    db_pool = ThreadedConnectionPool(1, WEBHOOK_WORKERS, DATABASE_URL)
+    # extra_float_digits: de score in 'next' moet exact terugkomen (PostgreSQL 11 rondt anders af)
+    search_pool = ThreadedConnectionPool(0, SEARCH_CONNECTIONS, DATABASE_URL, options='-c extra_float_digits=3')
+    conn = db_pool.getconn()
+    try:
+        cur = conn.cursor()
+        card_cache.prewarm(cur)
+        listener_run_id = start_listener_run(cur)
+        conn.commit()
+    finally:
+        db_pool.putconn(conn)
+    card_cache.start_listener()
+    for i in range(WEBHOOK_WORKERS):
+        threading.Thread(target=worker_loop, name=f"webhook-worker-{i}", daemon=True).start()
+    wachtend, dood = queue.stats()
+    print(f"Webhook queue: {wachtend} wachtend, {dood} mislukt")
 
 
 @app.route('/webhook', methods=['HEAD', 'GET'])
@@ -143,7 +387,7 @@ def webhook_verify():
 
 @app.route('/webhook', methods=['POST'])
 def webhook_receive():
-    """Ontvangt webhook events van Trello."""
+    """Ontvangt webhook events van Trello en zet ze in de queue."""
     try:
         payload = request.get_json(silent=True)
         
@@ -152,19 +396,146 @@ def webhook_receive():
         
         action = payload.get('action')
         if action:
-            process_webhook_action(action)
+            with metrics.span('queue_append'):
+                queue.append(action)
+            metrics.count('webhooks_ontvangen')
+            queue_signal.set()
         
         return jsonify({'status': 'ok'}), 200
         
     except Exception as e:
+        # Geen 200: Trello probeert het dan later opnieuw
         print(f"Webhook error: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint."""
-    return jsonify({'status': 'healthy'}), 200
+    """Health check endpoint, met de omvang van de queue."""
+    wachtend, dood = queue.stats()
+    return jsonify({'status': 'healthy', 'queue': wachtend, 'queue_failed': dood}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Tijd per stap en tellers (Prometheus tekstformaat), plus de huidige omvang van queue en cache."""
+    wachtend, dood = queue.stats()
+    meters = [
+        ('queue_wachtend', wachtend),
+        ('queue_mislukt', dood),
+        ('kaart_cache', len(card_cache.cards)),
+    ]
+    tekst = metrics.prometheus('autopeet_webhook') + ''.join(
+        f"# TYPE autopeet_webhook_{naam} gauge\nautopeet_webhook_{naam} {waarde}\n"
+        for naam, waarde in meters
+    )
+    return Response(tekst, mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/search', methods=['GET'])
+def search():
+    """Zoekt vacatures: ?q=<zoekterm>&limit=<aantal>&na=<'next' van de vorige pagina>."""
+    zoekterm = request.args.get('q', '').strip()
+    if not zoekterm:
+        return jsonify({'status': 'error', 'message': 'Parameter q ontbreekt'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', SEARCH_DEFAULT_LIMIT)), 1), SEARCH_MAX_LIMIT)
+        na = parse_search_cursor(request.args['na']) if request.args.get('na') else None
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Ongeldige limit of na'}), 400
+
+    conn = None
+    try:
+        conn = search_pool.getconn()
+        with metrics.span('search'):
+            resultaten = search_vacatures(conn.cursor(), zoekterm, limit, na)
+    except PoolError:
+        return jsonify({'status': 'error', 'message': 'Te veel zoekopdrachten tegelijk'}), 503
+    except psycopg2.Error as e:
+        print(f"Zoeken mislukt: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    finally:
+        if conn:
+            search_pool.putconn(conn, close=bool(conn.closed))
+    metrics.count('zoekopdrachten')
+
+    for vac in resultaten:
+        vac['vacature_id'] = str(vac['vacature_id'])
+        vac['eerste_gezien_op'] = vac['eerste_gezien_op'].isoformat()
+    volgende = None
+    if len(resultaten) == limit:
+        laatste = resultaten[-1]
+        volgende = f"{laatste['score']!r}:{laatste['vacature_id']}"
+    return jsonify({'results': resultaten, 'next': volgende}), 200
+
+
+def fetch_board_actions(since):
+    """
+    Generator: haalt de acties van het bord op sinds `since`, per pagina van
+    BACKFILL_PAGE_SIZE (nieuwste eerst, daarna steeds ouder via `before`).
+    """
+    url = f"https://api.trello.com/1/boards/{TRELLO_BOARD_ID}/actions"
+    params = {
+        'key': TRELLO_API_KEY,
+        'token': TRELLO_TOKEN,
+        'filter': ','.join(BACKFILL_ACTION_TYPES),
+        'limit': BACKFILL_PAGE_SIZE,
+    }
+    if since:
+        params['since'] = since
+    
+    while True:
+        response = requests.get(url, params=params, timeout=60)
+        response.raise_for_status()
+        page = response.json()
+        if page:
+            yield page
+        if len(page) < BACKFILL_PAGE_SIZE:
+            return
+        params['before'] = page[-1]['id']
+
+
+def backfill(since=None):
+    """
+    Haalt gemiste acties op bij Trello (bijv. toen de listener niet draaide) en
+    slaat ze op via dezelfde mapping als de webhook; al opgeslagen acties
+    (zelfde action id) worden overgeslagen. Zonder `since`: vanaf het laatste
+    webhook event van vóór de laatste start van de listener, met een uur overlap.
+    Het laatste event overall kan al van na de herstart zijn, en dan zou het gat
+    van de storing overgeslagen worden.
+    """
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        if not since:
+            cur.execute("""
+                SELECT tijdstip - INTERVAL '1 hour' FROM vacature_events
+                WHERE bron LIKE 'webhook%%'
+                  AND tijdstip < COALESCE(
+                      (SELECT MAX(start_tijd) FROM job_runs WHERE job_type = 'WEBHOOK'),
+                      'infinity'
+                  )
+                ORDER BY tijdstip DESC
+                LIMIT 1
+            """)
+            laatste = cur.fetchone()
+            since = laatste[0].isoformat() if laatste else None
+        print(f"Backfill van Trello acties sinds {since or 'het begin'}...")
+        
+        aantal_acties = 0
+        aantal_nieuw = 0
+        for page in fetch_board_actions(since):
+            aantal_acties += len(page)
+            # Oudste eerst opslaan, zoals ze ook binnen zouden komen
+            aantal_nieuw += store_actions(conn, list(reversed(page)), bron='webhook:backfill')
+        
+        print(f"✓ Backfill klaar: {aantal_acties} acties bekeken, {aantal_nieuw} events toegevoegd")
+        return aantal_nieuw
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 
 def register_webhook(callback_url):
@@ -227,6 +598,9 @@ if __name__ == "__main__":
         elif command == 'list':
             list_webhooks()
             
+        elif command == 'backfill':
+            backfill(sys.argv[2] if len(sys.argv) > 2 else None)
+            
         elif command == 'delete' and len(sys.argv) > 2:
             webhook_id = sys.argv[2]
             if delete_webhook(webhook_id):
@@ -238,10 +612,16 @@ if __name__ == "__main__":
             print("  python webhook_listener.py                    - Start server")
             print("  python webhook_listener.py register <URL>     - Register webhook")
             print("  python webhook_listener.py list               - List webhooks")
+            print("  python webhook_listener.py backfill [sinds]   - Gemiste acties ophalen bij Trello")
             print("  python webhook_listener.py delete <ID>        - Delete webhook")
     else:
-        print("Starting webhook listener on port 5000...")
+        start_workers()
+        print(f"Starting webhook listener on port {WEBHOOK_PORT}...")
         print("Endpoints:")
         print("  GET  /health  - Health check")
         print("  POST /webhook - Trello webhook receiver")
-        app.run(host='0.0.0.0', port=5000, debug=True)
+        # Geen debug modus: de reloader zou de workers dubbel starten
+        try:
+            app.run(host='0.0.0.0', port=WEBHOOK_PORT, threaded=True)
+        finally:
+            finish_listener_run()
@@ -0,0 +1,114 @@
+"""
+Webhook Queue
+Duurzame lokale wachtrij (SQLite in WAL modus) voor binnenkomende Trello acties.
+De listener zet elke actie erin en antwoordt direct; workers halen ze er in
+batches weer uit. Acties overleven zo een herstart of een onbereikbare database.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WEBHOOK_QUEUE_PATH = os.getenv('WEBHOOK_QUEUE_PATH', '.webhook_queue.sqlite3')
+# Na zoveel mislukte pogingen blijft een actie als 'dood' in de queue staan (kolom fout)
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '5'))
+# Hoe lang een geclaimde batch voor andere workers onzichtbaar is
+CLAIM_SECONDS = 300
+
+
+class WebhookQueue:
+    """
+    Wachtrij op schijf. Elke thread krijgt een eigen SQLite connectie; claimen
+    gebeurt in een BEGIN IMMEDIATE transactie, dus ook veilig met meerdere processen.
+    """
+
+    def __init__(self, path=WEBHOOK_QUEUE_PATH):
+        self.path = path
+        self.local = threading.local()
+        conn = self.connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS acties (
+                id           INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload      TEXT NOT NULL,
+                ontvangen_op REAL NOT NULL,
+                pogingen     INTEGER NOT NULL DEFAULT 0,
+                geclaimd_tot REAL NOT NULL DEFAULT 0,
+                fout         TEXT
+            )
+        """)
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            # FULL: een 200 naar Trello betekent dat de actie echt op schijf staat
+            conn.execute("PRAGMA synchronous=FULL")
+            self.local.conn = conn
+        return conn
+
+    def append(self, action):
+        """Zet een ruwe Trello actie achteraan in de queue."""
+        self.connection().execute(
+            "INSERT INTO acties (payload, ontvangen_op) VALUES (?, ?)",
+            (json.dumps(action), time.time())
+        )
+
+    def claim(self, limit):
+        """Claimt de oudste beschikbare acties. Geeft een lijst (id, actie) terug."""
+        conn = self.connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("""
+                SELECT id, payload FROM acties
+                WHERE fout IS NULL AND geclaimd_tot < ?
+                ORDER BY id
+                LIMIT ?
+            """, (now, limit)).fetchall()
+            conn.executemany(
+                "UPDATE acties SET geclaimd_tot = ? WHERE id = ?",
+                [(now + CLAIM_SECONDS, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def ack(self, ids):
+        """Verwijdert verwerkte acties."""
+        self.connection().executemany("DELETE FROM acties WHERE id = ?", [(i,) for i in ids])
+
+    def release(self, ids, delay):
+        """Geeft acties terug aan de queue (bijv. database onbereikbaar), zonder poging te tellen."""
+        self.connection().executemany(
+            "UPDATE acties SET geclaimd_tot = ? WHERE id = ?",
+            [(time.time() + delay, i) for i in ids]
+        )
+
+    def fail(self, action_id, error):
+        """Telt een mislukte poging; na WEBHOOK_MAX_ATTEMPTS blijft de actie met de fout staan."""
+        conn = self.connection()
+        conn.execute("""
+            UPDATE acties
+            SET pogingen = pogingen + 1,
+                geclaimd_tot = ? + 30 * (pogingen + 1),
+                fout = CASE WHEN pogingen + 1 >= ? THEN ? END
+            WHERE id = ?
+        """, (time.time(), WEBHOOK_MAX_ATTEMPTS, str(error), action_id))
+
+    def reset_claims(self):
+        """Na een herstart: claims van het vorige proces vrijgeven."""
+        self.connection().execute("UPDATE acties SET geclaimd_tot = 0 WHERE fout IS NULL")
+
+    def stats(self):
+        """Geeft (wachtend, dood) terug."""
+        return self.connection().execute(
+            "SELECT COALESCE(SUM(fout IS NULL), 0), COALESCE(SUM(fout IS NOT NULL), 0) FROM acties"
+        ).fetchone()
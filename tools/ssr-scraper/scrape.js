@@ -10,6 +10,9 @@ const fs = require('fs');
 
 chromium.use(StealthPlugin());
 
+// In --ndjson mode gaat stdout naar de ingest (portals/ssr.py), logging naar stderr
+let log = console.log;
+
 // Site configurations
 const SITES = {
   sevenstars: {
@@ -53,7 +56,7 @@ async function scrapeJobList(site, browser) {
   const config = SITES[site];
   if (!config) throw new Error(`Unknown site: ${site}`);
   
-  console.log(`\n📋 Scraping job list from ${config.name}...`);
+  log(`\n📋 Scraping job list from ${config.name}...`);
   
   const page = await browser.newPage();
   await page.goto(config.listUrl, { waitUntil: 'networkidle', timeout: 30000 });
@@ -89,16 +92,16 @@ async function scrapeJobList(site, browser) {
   }, { selector: config.jobLinkSelector, pattern: config.idPattern.source });
   
   await page.close();
-  console.log(`   Found ${jobs.length} jobs`);
+  log(`   Found ${jobs.length} jobs`);
   
   return jobs;
 }
 
-async function scrapeJobDetails(site, jobs, browser, limit = 5) {
+async function scrapeJobDetails(site, jobs, browser, limit = 5, onJob = () => {}) {
   const config = SITES[site];
   const baseUrl = new URL(config.listUrl).origin;
   
-  console.log(`\n📄 Scraping details for ${Math.min(limit, jobs.length)} jobs...`);
+  log(`\n📄 Scraping details for ${Math.min(limit, jobs.length)} jobs...`);
   
   const results = [];
   const page = await browser.newPage();
@@ -107,7 +110,7 @@ async function scrapeJobDetails(site, jobs, browser, limit = 5) {
     const job = jobs[i];
     const url = job.href.startsWith('http') ? job.href : baseUrl + job.href;
     
-    console.log(`   [${i+1}/${Math.min(limit, jobs.length)}] ${job.id}`);
+    log(`   [${i+1}/${Math.min(limit, jobs.length)}] ${job.id}`);
     
     try {
       await page.goto(url, { waitUntil: 'networkidle', timeout: 20000 });
@@ -116,9 +119,10 @@ async function scrapeJobDetails(site, jobs, browser, limit = 5) {
       const details = await config.getJobDetails(page);
       results.push({ ...job, url, ...details });
     } catch (err) {
-      console.log(`      ⚠️ Error: ${err.message}`);
+      log(`      ⚠️ Error: ${err.message}`);
       results.push({ ...job, url, error: err.message });
     }
+    onJob(results[results.length - 1]);
   }
   
   await page.close();
@@ -144,17 +148,20 @@ async function autoScroll(page) {
 }
 
 async function main() {
-  const args = process.argv.slice(2);
+  const argv = process.argv.slice(2);
+  const ndjson = argv.includes('--ndjson');
+  const args = argv.filter(arg => !arg.startsWith('--'));
   const site = args[0] || 'sevenstars';
   const detailLimit = parseInt(args[1]) || 5;
+  if (ndjson) log = console.error;
   
   if (!SITES[site]) {
     console.log('Available sites:', Object.keys(SITES).join(', '));
     process.exit(1);
   }
   
-  console.log(`\n🕷️  SSR Scraper - ${SITES[site].name}`);
-  console.log('━'.repeat(40));
+  log(`\n🕷️  SSR Scraper - ${SITES[site].name}`);
+  log('━'.repeat(40));
   
   const browser = await chromium.launch({ headless: true });
   
@@ -162,8 +169,14 @@ async function main() {
     // Get job list
     const jobs = await scrapeJobList(site, browser);
     
-    // Get details for first N jobs
-    const detailed = await scrapeJobDetails(site, jobs, browser, detailLimit);
+    // Get details for first N jobs (in NDJSON mode: stream each job to stdout)
+    const onJob = ndjson ? (job) => process.stdout.write(JSON.stringify(job) + '\n') : undefined;
+    const detailed = await scrapeJobDetails(site, jobs, browser, detailLimit, onJob);
+    
+    if (ndjson) {
+      log(`\n✅ Streamed ${detailed.length} jobs`);
+      return;
+    }
     
     // Output
     const output = {